@@ -1,6 +1,8 @@
 from app import create_app
 
-app = create_app()
+# Math sandbox workers re-import this script as __mp_main__; they don't need the app
+if __name__ != '__mp_main__':
+    app = create_app()
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True) 
\ No newline at end of file
@@ -53,5 +53,11 @@ def create_app():
     # Create database tables
     with app.app_context():
         db.create_all()
+
+    # Start the evaluation pool's workers now so the first request doesn't wait for them
+    from app.services.evaluation_executor import get_executor
+    executor = get_executor()
+    if executor.mode != 'inline':
+        executor.warmup()
     
     return app 
\ No newline at end of file
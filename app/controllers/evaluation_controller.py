@@ -1,6 +1,13 @@
 from flask import Blueprint, request, jsonify
 from app.services.evaluation_service import EvaluationService
-from app.utils.nlp_evaluator import NLPEvaluator
+from app.services.evaluation_executor import get_executor
+from app.utils.embedding_cache import embedding_cache
+from app.utils.math_evaluator import MathEvaluator
+from app.utils.math_sandbox import get_sandbox
+from app.utils.metric_registry import MetricRegistry
+from app.utils.model_registry import ModelRegistry
+from app.utils.result_cache import result_cache
+from app.utils.token_cache import TokenCache
 import json
 
 evaluation_bp = Blueprint('evaluation', __name__)
@@ -32,6 +39,10 @@ def _validate_and_sanitize_responses(responses):
     
     return invalid_responses
 
+def _parse_metrics(data):
+    """Helper function to validate the optional metrics list"""
+    return MetricRegistry.resolve(data.get('metrics'))
+
 def _debug_input_data(question, responses, endpoint_name="API"):
     """Helper function for debug logging"""
     print(f"\n{'*'*80}")
@@ -53,6 +64,11 @@ def evaluate():
         question = data['question']
         responses = data['responses']
         
+        try:
+            metrics = _parse_metrics(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         _debug_input_data(question, responses)
         
         invalid_responses = _validate_and_sanitize_responses(responses)
@@ -69,7 +85,7 @@ def evaluate():
             print("WARNING: Some model responses are identical!")
         print("*"*80 + "\n")
         
-        result = EvaluationService.evaluate_and_save(question, responses)
+        result = EvaluationService.evaluate_and_save(question, responses, metrics=metrics)
         return jsonify(result), 200
         
     except Exception as e:
@@ -87,6 +103,11 @@ def evaluate_metrics_only():
         question = data['question']
         responses = data['responses']
         
+        try:
+            metrics = _parse_metrics(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         _debug_input_data(question, responses, "METRICS")
         
         invalid_responses = _validate_and_sanitize_responses(responses)
@@ -103,9 +124,10 @@ def evaluate_metrics_only():
             print("WARNING: Some model responses are identical!")
         print("*"*80 + "\n")
         
-        evaluation_results = {}
-        for model_name, response_text in responses.items():
-            evaluation_results[model_name] = NLPEvaluator.evaluate_text(question, response_text)
+        model_names = list(responses.keys())
+        batch_metrics = MetricRegistry.evaluate(question, [responses[m] for m in model_names],
+                                                metrics=metrics, executor=get_executor())
+        evaluation_results = dict(zip(model_names, batch_metrics))
         
         return jsonify({
             'question': question,
@@ -115,6 +137,30 @@ def evaluate_metrics_only():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@evaluation_bp.route('/evaluate/metrics', methods=['GET'])
+def list_metrics():
+    """Endpoint to list the metrics that can be requested"""
+    return jsonify({
+        'metrics': [metric.to_dict() for metric in MetricRegistry.available()]
+    }), 200
+
+@evaluation_bp.route('/evaluate/cache', methods=['GET'])
+def get_cache_stats():
+    """Endpoint to report evaluation result, token and math expression cache hit rates"""
+    return jsonify({
+        'results': result_cache.stats(),
+        'tokens': TokenCache.stats(),
+        'embeddings': embedding_cache.stats(),
+        'math': MathEvaluator.cache_stats(),
+        'math_canonical': MathEvaluator.canonical_cache_stats(),
+        'math_sandbox': get_sandbox().stats() if get_sandbox() else None
+    }), 200
+
+@evaluation_bp.route('/evaluate/models', methods=['GET'])
+def get_model_stats():
+    """Endpoint to report load time and memory of the loaded embedding models"""
+    return jsonify({'models': ModelRegistry.stats()}), 200
+
 @evaluation_bp.route('/evaluation/<int:evaluation_id>', methods=['GET'])
 def get_evaluation(evaluation_id):
     """Endpoint to get a specific evaluation by ID"""
@@ -0,0 +1,134 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from app.utils.nlp_evaluator import NLPEvaluator, AnalyzedText
+from app.utils.nltk_resources import NLTKResources
+from app.utils.tokenizers import Tokenizer
+
+# How evaluation work is run: 'inline' (request thread), 'thread' or 'process'
+EVAL_EXECUTOR = os.getenv('EVAL_EXECUTOR', 'inline').lower()
+
+# Number of workers for the thread and process pools
+EVAL_WORKERS = int(os.getenv('EVAL_WORKERS', str(os.cpu_count() or 1)))
+
+MODES = ('inline', 'thread', 'process')
+
+def _warm_worker(tokenizer_backend):
+    # Runs once in each worker so the first real task doesn't pay for
+    # loading NLTK data, compiling regexes or filling the stem cache
+    Tokenizer.set_backend(tokenizer_backend)
+    NLTKResources.warmup()
+    NLPEvaluator.score_pairs(["Warm up the evaluator"], ["The evaluator is warm. It is ready."])
+
+def _run_chunk(fn, questions, responses):
+    return fn(questions, responses)
+
+class EvaluationExecutor:
+    """
+    Spreads evaluation work across a thread or process pool
+
+    Work is given as aligned question/response lists and split into one
+    chunk per worker, balanced by response length, so a request finishes in
+    roughly the time of its largest chunk. Results always come back in the
+    order of the input.
+    """
+    def __init__(self, mode=EVAL_EXECUTOR, workers=EVAL_WORKERS):
+        if mode not in MODES:
+            raise ValueError(f"Unknown evaluation executor '{mode}', expected one of {MODES}")
+        self.mode = mode
+        self.workers = max(int(workers), 1)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    if self.mode == 'thread':
+                        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+                    else:
+                        # Spawned workers don't inherit locks held by request threads
+                        self._pool = ProcessPoolExecutor(
+                            max_workers=self.workers,
+                            mp_context=multiprocessing.get_context('spawn'),
+                            initializer=_warm_worker,
+                            initargs=(Tokenizer.backend,)
+                        )
+        return self._pool
+
+    def _chunk(self, responses):
+        # Greedy longest-first assignment of item indices to the least loaded chunk
+        n_chunks = min(self.workers, len(responses))
+        chunks = [[] for _ in range(n_chunks)]
+        loads = [0] * n_chunks
+        order = sorted(range(len(responses)), key=lambda i: len(str(responses[i] or '')), reverse=True)
+        for i in order:
+            target = loads.index(min(loads))
+            chunks[target].append(i)
+            loads[target] += len(str(responses[i] or '')) + 1
+        return [sorted(chunk) for chunk in chunks if chunk]
+
+    def run(self, fn, questions, responses):
+        """
+        Run fn(questions, responses) over chunks of aligned items in parallel
+
+        Args:
+            fn: Picklable function taking aligned question and response lists
+                and returning one result per pair
+            questions: List of questions
+            responses: List of responses aligned with questions
+
+        Returns:
+            List of results in the same order as the input
+        """
+        if self.mode == 'inline' or len(responses) <= 1:
+            return fn(questions, responses)
+
+        if self.mode == 'process':
+            # Send raw text to worker processes rather than analyses
+            questions = [q.text if isinstance(q, AnalyzedText) else q for q in questions]
+            responses = [r.text if isinstance(r, AnalyzedText) else r for r in responses]
+
+        chunks = self._chunk(responses)
+        pool = self._get_pool()
+        futures = [pool.submit(_run_chunk, fn,
+                               [questions[i] for i in chunk],
+                               [responses[i] for i in chunk])
+                   for chunk in chunks]
+
+        results = [None] * len(responses)
+        for chunk, future in zip(chunks, futures):
+            for i, result in zip(chunk, future.result()):
+                results[i] = result
+        return results
+
+    def warmup(self):
+        """Start the pool's workers ahead of the first request"""
+        if self.mode == 'inline':
+            _warm_worker(Tokenizer.backend)
+            return
+        pool = self._get_pool()
+        list(pool.map(_run_chunk, [NLPEvaluator.score_pairs] * self.workers,
+                      [["Warm up"]] * self.workers, [["Warm up."]] * self.workers))
+
+    def shutdown(self):
+        """Stop the pool's workers"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    """Return the process-wide evaluation executor configured from the environment"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = EvaluationExecutor()
+                atexit.register(_executor.shutdown)
+    return _executor
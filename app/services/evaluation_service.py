@@ -1,5 +1,6 @@
 # filepath: c:\Users\Ahmad\Desktop\Desktop\BE Project\reval_backend\app\services\evaluation_service.py
-from app.utils.nlp_evaluator import NLPEvaluator
+from app.utils.metric_registry import MetricRegistry
+from app.services.evaluation_executor import get_executor
 from app.models.evaluation import Evaluation
 from app.models.leaderboard import Leaderboard
 from app import db
@@ -9,13 +10,14 @@ import pprint
 
 class EvaluationService:
     @staticmethod
-    def evaluate_responses(question, responses):
+    def evaluate_responses(question, responses, metrics=None):
         """
         Evaluate responses from multiple LLMs for a given question
         
         Args:
             question: The user's question
             responses: Dictionary of model responses (model_name -> response_text)
+            metrics: Optional list of metric names to compute (default: the NLP metrics)
             
         Returns:
             Dictionary of evaluation scores for each model
@@ -26,9 +28,9 @@ class EvaluationService:
         print(f"DEBUG: Evaluating responses for question: '{question}'")
         print("="*80)
         
-        # Evaluate each model's response
+        # Skip empty responses
+        scored_models = []
         for model_name, response_text in responses.items():
-            # Skip empty responses
             if not response_text:
                 print(f"DEBUG: Skipping {model_name} - Empty response")
                 continue
@@ -36,10 +38,15 @@ class EvaluationService:
             print(f"\nDEBUG: Evaluating {model_name} response:")
             print(f"Response: '{response_text[:100]}{'...' if len(response_text) > 100 else ''}'")
             print(f"Response type: {type(response_text)}, ID: {id(response_text)}")
-                
-            # Calculate metrics using the NLP evaluator
-            metrics = NLPEvaluator.evaluate_text(question, response_text)
-            
+            scored_models.append(model_name)
+        
+        # Score every response against the question in one batch; only the
+        # analysis stages the requested metrics need are run, and uncached
+        # responses are spread across the executor's workers
+        batch_metrics = MetricRegistry.evaluate(question, [responses[m] for m in scored_models],
+                                                metrics=metrics, executor=get_executor())
+        
+        for model_name, metrics in zip(scored_models, batch_metrics):
             # Print metrics for debugging
             print(f"Metrics for {model_name}:")
             pprint.pprint(metrics)
@@ -54,21 +61,11 @@ class EvaluationService:
         if len(evaluation_results) > 1:
             print("\nDEBUG: Checking for identical metrics across models...")
             
-            # Collect all coherence scores
-            coherence_scores = [metrics['coherence'] for metrics in evaluation_results.values()]
-            token_overlap_scores = [metrics['token_overlap'] for metrics in evaluation_results.values()]
-            length_ratio_scores = [metrics['length_ratio'] for metrics in evaluation_results.values()]
-            overall_scores = [metrics['overall_score'] for metrics in evaluation_results.values()]
-            
             # Check if all scores are identical
-            if len(set(coherence_scores)) == 1:
-                print(f"WARNING: All coherence scores are identical: {coherence_scores[0]}")
-            if len(set(token_overlap_scores)) == 1:
-                print(f"WARNING: All token overlap scores are identical: {token_overlap_scores[0]}")
-            if len(set(length_ratio_scores)) == 1:
-                print(f"WARNING: All length ratio scores are identical: {length_ratio_scores[0]}")
-            if len(set(overall_scores)) == 1:
-                print(f"WARNING: All overall scores are identical: {overall_scores[0]}")
+            for metric_name in next(iter(evaluation_results.values())):
+                scores = [metrics[metric_name] for metrics in evaluation_results.values()]
+                if len(set(scores)) == 1:
+                    print(f"WARNING: All {metric_name.replace('_', ' ')} scores are identical: {scores[0]}")
                 
         print("="*80 + "\n")
         
@@ -133,19 +130,22 @@ class EvaluationService:
         return [entry.to_dict() for entry in leaderboard_entries]
     
     @staticmethod
-    def evaluate_and_save(question, responses):
+    def evaluate_and_save(question, responses, metrics=None):
         """
         Evaluate LLM responses and save results to database
         
         Args:
             question: The user's question
             responses: Dictionary of model responses
+            metrics: Optional list of extra metric names to compute; the
+                metrics the leaderboard averages are always included
             
         Returns:
             Dictionary with evaluation results and leaderboard
         """
         # Evaluate responses
-        evaluation_results = EvaluationService.evaluate_responses(question, responses)
+        evaluation_results = EvaluationService.evaluate_responses(question, responses,
+                                                                  metrics=MetricRegistry.with_core(metrics))
         
         # Save to database
         evaluation = EvaluationService.save_evaluation(question, responses, evaluation_results)
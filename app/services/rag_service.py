@@ -1,27 +1,20 @@
 from typing import List, Dict, Tuple
 from app.utils.evaluation import evaluator
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from app.utils.knowledge_base import KnowledgeBase
+from app.utils.model_registry import ModelRegistry
 import numpy as np
 
 class RAGService:
-    def __init__(self):
-        # Initialize the sentence transformer model
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        # Sample knowledge base - in a real application, this would be your actual knowledge base
-        self.knowledge_base = [
-            "Paris is the capital of France and is known as the City of Light.",
-            "The Eiffel Tower is a wrought-iron lattice tower in Paris, France.",
-            "The Louvre Museum is the world's largest art museum in Paris.",
-            "Jupiter is the largest planet in our solar system.",
-            "Jupiter is the fifth planet from the Sun.",
-            "Jupiter has 79 known moons.",
-            "Jane Austen was an English novelist.",
-            "Pride and Prejudice was published in 1813.",
-            "Jane Austen's works critique the British landed gentry."
-        ]
-        # Pre-compute embeddings for the knowledge base
-        self.kb_embeddings = self.model.encode(self.knowledge_base)
+    def __init__(self, knowledge_base_path: str = None):
+        # Knowledge base passages come from a JSONL corpus; their embeddings are
+        # memory-mapped and only re-encoded for passages that changed
+        self.knowledge_base = KnowledgeBase.load(knowledge_base_path)
+        self.kb_embeddings = self.knowledge_base.embeddings
+
+    @property
+    def model(self):
+        """The shared sentence transformer model, loaded on first use."""
+        return ModelRegistry.get()
 
     def retrieve_contexts(self, query: str, top_k: int = 3) -> List[str]:
         """
@@ -34,18 +27,34 @@ class RAGService:
         Returns:
             List of relevant contexts
         """
-        # Encode the query
-        query_embedding = self.model.encode(query)
+        return self.retrieve_contexts_batch([query], top_k)[0]
+
+    def retrieve_contexts_batch(self, queries: List[str], top_k: int = 3) -> List[List[str]]:
+        """
+        Retrieve relevant contexts for many queries at once.
+        
+        Args:
+            queries: The user's questions
+            top_k: Number of contexts to retrieve per query
+            
+        Returns:
+            List of relevant contexts for each query, most similar first
+        """
+        top_k = min(top_k, len(self.knowledge_base))
+        if not queries or top_k <= 0:
+            return [[] for _ in queries]
         
-        # Calculate similarities
-        similarities = cosine_similarity(
-            [query_embedding],
-            self.kb_embeddings
-        )[0]
+        # Encode all queries in one batch
+        query_embeddings = ModelRegistry.encode(queries)
         
-        # Get top-k most similar contexts
-        top_indices = np.argsort(similarities)[-top_k:][::-1]
-        return [self.knowledge_base[i] for i in top_indices]
+        # Cosine similarities of every query to every passage (embeddings are normalized)
+        similarities = query_embeddings @ self.kb_embeddings.T
+        
+        # Top-k per query without sorting whole rows, then order just those k
+        top_indices = np.argpartition(-similarities, top_k - 1, axis=1)[:, :top_k]
+        order = np.argsort(-np.take_along_axis(similarities, top_indices, axis=1), axis=1, kind='stable')
+        top_indices = np.take_along_axis(top_indices, order, axis=1)
+        return [[self.knowledge_base[i] for i in row] for row in top_indices]
 
     def generate_answer(self, query: str, contexts: List[str]) -> str:
         """
@@ -103,8 +112,10 @@ class RAGService:
         Returns:
             List of tuples containing answers, contexts, and evaluation metrics
         """
-        results = []
-        for query, reference in zip(queries, references):
-            answer, contexts, metrics = self.process_query(query, reference)
-            results.append((answer, contexts, metrics))
-        return results 
\ No newline at end of file
+        # Retrieve for all queries with one similarity matrix
+        contexts_list = self.retrieve_contexts_batch(queries)
+        answers = [self.generate_answer(query, contexts) for query, contexts in zip(queries, contexts_list)]
+        
+        # Evaluate all responses with one encode and vectorized metrics
+        metrics_list = evaluator.evaluate_batch(queries, answers, references, contexts_list)
+        return list(zip(answers, contexts_list, metrics_list))
@@ -0,0 +1,165 @@
+import os
+import queue
+import threading
+import time
+import weakref
+import numpy as np
+
+# Most texts merged into one model.encode call (0 disables micro-batching)
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '64'))
+
+# Longest a queued encode request waits for others to join its batch, in milliseconds
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv('EMBEDDING_BATCH_WAIT_MS', '5'))
+
+class _Request:
+    def __init__(self, texts, kwargs):
+        self.texts = texts
+        self.kwargs = kwargs
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class BatchEncoder:
+    """
+    Front-end that merges concurrent encode calls into shared model batches
+
+    Callers from any thread queue their texts; a background thread runs one
+    model.encode over the queued texts and hands each caller its own rows.
+    A batch is flushed when it holds max_batch texts, when max_wait has
+    passed since its first request, or as soon as every caller currently
+    encoding has joined it, so a lone request is not delayed. Requests that
+    arrive while the model is busy are merged into the next batch. Only the
+    background thread touches the model.
+
+    Has the same encode(texts, **kwargs) interface as the model it wraps.
+
+    Threads don't survive fork (gunicorn --preload, or an encoder used at
+    import time), so a forked child resets the queue and starts its own
+    background thread on first use.
+    """
+    def __init__(self, model, max_batch=EMBEDDING_BATCH_SIZE, max_wait_ms=EMBEDDING_BATCH_WAIT_MS):
+        self.model = model
+        self.max_batch = max(int(max_batch), 1)
+        self.max_wait = max(max_wait_ms, 0) / 1000
+        self._reset()
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        _encoders.add(self)
+
+    def _reset(self):
+        # Fresh queue, lock and thread state, e.g. in a forked child where the
+        # parent's thread doesn't exist and its lock may be held
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._callers = 0
+        self._thread = None
+        self._pid = os.getpid()
+
+    def _start(self):
+        if self._pid != os.getpid():
+            self._reset()
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='batch-encoder', daemon=True)
+                    self._thread.start()
+
+    def encode(self, texts, **kwargs):
+        """
+        Encode texts as part of a shared batch
+
+        Args:
+            texts: List of texts
+            **kwargs: Passed to model.encode; only requests with equal
+                keyword arguments share a batch
+
+        Returns:
+            Array with one row per text
+        """
+        if isinstance(texts, str):
+            return self.encode([texts], **kwargs)[0]
+        request = _Request(list(texts), kwargs)
+        self._start()
+        with self._lock:
+            self._callers += 1
+        try:
+            self._queue.put(request)
+            request.done.wait()
+        finally:
+            with self._lock:
+                self._callers -= 1
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _collect(self):
+        # Block for the first request, then gather more until the batch is full,
+        # the deadline passes or no other caller is left to wait for
+        batch = [self._queue.get()]
+        size = len(batch[0].texts)
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch and len(batch) < self._callers:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch
+
+    def _run(self):
+        pending = []
+        while True:
+            batch = pending or self._collect()
+            # Requests with different encode options can't share a model call
+            kwargs = batch[0].kwargs
+            group = [request for request in batch if request.kwargs == kwargs]
+            pending = [request for request in batch if request.kwargs != kwargs]
+            self._flush(group)
+
+    def _flush(self, group):
+        texts = [text for request in group for text in request.texts]
+        try:
+            if texts:
+                embeddings = np.asarray(self.model.encode(texts, **group[0].kwargs))
+            else:
+                embeddings = np.zeros((0, 0), dtype=np.float32)
+            start = 0
+            for request in group:
+                request.result = embeddings[start:start + len(request.texts)]
+                start += len(request.texts)
+        except Exception as e:
+            for request in group:
+                request.error = e
+        finally:
+            self.batches += 1
+            self.requests += len(group)
+            self.texts += len(texts)
+            for request in group:
+                request.done.set()
+
+    def stats(self):
+        """Return batch counters and the mean batch size"""
+        return {
+            'max_batch': self.max_batch,
+            'max_wait_ms': self.max_wait * 1000,
+            'batches': self.batches,
+            'requests': self.requests,
+            'texts': self.texts,
+            'mean_batch_texts': self.texts / self.batches if self.batches else 0.0,
+            'mean_batch_requests': self.requests / self.batches if self.batches else 0.0
+        }
+
+# Every encoder, so a forked child can reset them all
+_encoders = weakref.WeakSet()
+
+def _reset_after_fork():
+    for encoder in list(_encoders):
+        encoder._reset()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
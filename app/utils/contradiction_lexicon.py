@@ -0,0 +1,117 @@
+import json
+import os
+
+# Lexicon of antonym pairs and negation markers used for logical consistency
+CONTRADICTION_LEXICON_PATH = os.getenv(
+    'CONTRADICTION_LEXICON_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'contradiction_lexicon.json')
+)
+
+class ContradictionLexicon:
+    """
+    Contradiction detector compiled from a lexicon of antonym pairs and negation markers
+
+    Every lexicon term is compiled once into a hash index of term -> pairs,
+    so finding contradictions is a single pass over the tokens with one
+    dictionary lookup per token. The cost per response does not grow with
+    the number of pairs in the lexicon.
+
+    Two kinds of hits are reported:
+      - 'antonym': both terms of a pair are asserted ("prices increase ... prices decrease")
+      - 'negation': a term is both asserted and negated ("it is true ... it is not true")
+
+    A term is negated when a negation marker appears at most negation_window
+    tokens before it, with no punctuation in between. A negated antonym
+    ("increase ... does not decrease") is consistent and is not a hit. With
+    a negation_window of 0 nothing is negated, so the only hits are pairs
+    whose terms both occur, as in the original pair check.
+
+    Ignored tokens (LogicEvaluator passes the stopwords) are never matched
+    as terms, but negation markers among them still apply.
+
+    Args:
+        antonyms: List of (term, term) pairs
+        negations: List of negation marker tokens
+        negation_window: Number of tokens a negation marker applies to
+        penalty: Score deducted per hit by LogicEvaluator
+        ignore: Tokens that are never matched as terms
+    """
+    def __init__(self, antonyms, negations=(), negation_window=3, penalty=0.2, ignore=()):
+        self.pairs = [(str(a).lower(), str(b).lower()) for a, b in antonyms]
+        self.negations = frozenset(str(n).lower() for n in negations)
+        self.negation_window = int(negation_window)
+        self.penalty = float(penalty)
+        self.ignore = frozenset(ignore)
+
+        # term -> list of pair ids it belongs to
+        self.index = {}
+        for pair_id, pair in enumerate(self.pairs):
+            for term in pair:
+                self.index.setdefault(term, []).append(pair_id)
+
+    @staticmethod
+    def load(path=None, ignore=()):
+        """Load a lexicon from a JSON file (default: CONTRADICTION_LEXICON_PATH)"""
+        with open(path or CONTRADICTION_LEXICON_PATH, encoding='utf-8') as f:
+            config = json.load(f)
+        return ContradictionLexicon(
+            config.get('antonyms', []),
+            config.get('negations', []),
+            config.get('negation_window', 3),
+            config.get('penalty', 0.2),
+            ignore
+        )
+
+    def find(self, tokens):
+        """
+        Find every contradiction in a list of lowercase tokens in one pass
+
+        Args:
+            tokens: Word tokens, including punctuation and stopwords
+
+        Returns:
+            List of hits, each a dictionary with 'type' ('antonym' or
+            'negation'), 'terms' and the token 'positions' of the first
+            occurrence of each side
+        """
+        index = self.index
+        negations = self.negations
+        ignore = self.ignore
+        asserted = {}
+        negated = {}
+        negated_until = -1
+
+        for position, token in enumerate(tokens):
+            if token in index and token not in ignore:
+                seen = negated if position <= negated_until else asserted
+                seen.setdefault(token, position)
+            if token in negations:
+                negated_until = position + self.negation_window
+            elif not token.isalnum():
+                # Punctuation ends the scope of a negation
+                negated_until = -1
+
+        hits = []
+        checked = set()
+        for term in asserted:
+            for pair_id in index[term]:
+                if pair_id in checked:
+                    continue
+                checked.add(pair_id)
+                first, second = self.pairs[pair_id]
+                if first in asserted and second in asserted:
+                    hits.append({
+                        'type': 'antonym',
+                        'terms': [first, second],
+                        'positions': [asserted[first], asserted[second]]
+                    })
+        for term in negated:
+            if term in asserted:
+                hits.append({
+                    'type': 'negation',
+                    'terms': [term, term],
+                    'positions': [asserted[term], negated[term]]
+                })
+
+        hits.sort(key=lambda hit: min(hit['positions']))
+        return hits
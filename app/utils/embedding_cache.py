@@ -0,0 +1,229 @@
+import hashlib
+import os
+import re
+import threading
+import numpy as np
+from app.utils.lru_cache import LRUCache
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; appends are then only locked in-process
+    fcntl = None
+
+# Number of embeddings kept in memory
+EMBEDDING_CACHE_SIZE = int(os.getenv('EMBEDDING_CACHE_SIZE', '20000'))
+
+# Optional directory for a persistent tier that survives restarts
+EMBEDDING_CACHE_DIR = os.getenv('EMBEDDING_CACHE_DIR')
+
+class _DiskStore:
+    """
+    Append-only embedding file for one model
+
+    Rows are raw float32 vectors in <model>.f32, read through a memory map so
+    worker processes share the pages. <model>.idx maps text hashes to row
+    numbers, one "hash row" line per embedding after a "# dim N" header.
+    Data is written before its index line, so readers only ever see complete
+    rows; other processes' appends are picked up by re-reading the index tail.
+    """
+    def __init__(self, directory, model_id):
+        name = re.sub(r'[^A-Za-z0-9_.-]', '_', model_id)
+        self.data_path = os.path.join(directory, f"{name}.f32")
+        self.index_path = os.path.join(directory, f"{name}.idx")
+        self.dim = None
+        self.rows = {}
+        self._index_offset = 0
+        self._map = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._refresh_index()
+
+    def _refresh_index(self):
+        # Read index lines appended since the last refresh; callers hold self._lock
+        # (or are the constructor)
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'r', encoding='ascii') as f:
+            f.seek(self._index_offset)
+            while True:
+                line = f.readline()
+                if not line.endswith('\n'):
+                    break  # Missing or partially written line; read it next time
+                self._index_offset = f.tell()
+                if line.startswith('# dim '):
+                    self.dim = int(line[6:])
+                    continue
+                key, row = line.split()
+                self.rows[key] = int(row)
+
+    def _row(self, row):
+        needed = row + 1
+        if self._map is None or self._map.shape[0] < needed:
+            rows = os.path.getsize(self.data_path) // (self.dim * 4)
+            self._map = np.memmap(self.data_path, dtype=np.float32, mode='r', shape=(rows, self.dim))
+        return np.array(self._map[row])
+
+    def get(self, key):
+        """Return a copy of the embedding stored for key, or None"""
+        with self._lock:
+            if key not in self.rows:
+                self._refresh_index()
+                if key not in self.rows:
+                    return None
+            return self._row(self.rows[key])
+
+    def append(self, keys, embeddings):
+        """Append embeddings for keys not stored yet"""
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        with self._lock:
+            self._refresh_index()
+            new = [i for i, key in enumerate(keys) if key not in self.rows]
+            if not new:
+                return
+            if self.dim is None:
+                self.dim = embeddings.shape[1]
+            row_bytes = self.dim * 4
+
+            with open(self.index_path, 'a', encoding='ascii') as index:
+                if fcntl is not None:
+                    fcntl.flock(index, fcntl.LOCK_EX)
+                try:
+                    with open(self.data_path, 'ab') as data:
+                        # Start on a row boundary even if an earlier write was cut short
+                        first_row = -(-data.seek(0, os.SEEK_END) // row_bytes)
+                        data.truncate(first_row * row_bytes)
+                        data.seek(first_row * row_bytes)
+                        data.write(embeddings[new].tobytes())
+                        data.flush()
+                        os.fsync(data.fileno())
+
+                    if index.tell() == 0:
+                        index.write(f"# dim {self.dim}\n")
+                    lines = []
+                    for offset, i in enumerate(new):
+                        self.rows[keys[i]] = first_row + offset
+                        lines.append(f"{keys[i]} {first_row + offset}\n")
+                    index.writelines(lines)
+                    index.flush()
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(index, fcntl.LOCK_UN)
+
+class EmbeddingCache:
+    """
+    Two-tier cache of text embeddings keyed by (model id, text hash)
+
+    Lookups go to an in-memory LRU first, then to an optional append-only,
+    memory-mapped file per model in EMBEDDING_CACHE_DIR; disk hits are
+    promoted to memory. Knowledge base passages, repeated questions and
+    reference answers are encoded once and reused across requests and
+    restarts.
+    """
+    def __init__(self, maxsize=EMBEDDING_CACHE_SIZE, directory=EMBEDDING_CACHE_DIR):
+        self.memory = LRUCache(maxsize, sizeof=lambda key, value: value.nbytes)
+        self.directory = directory
+        self._stores = {}
+        self._lock = threading.Lock()
+        self.disk_hits = 0
+        self.disk_misses = 0
+
+    @staticmethod
+    def text_hash(text):
+        """Hash a text for use in a cache key"""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def _store(self, model_id):
+        if model_id not in self._stores:
+            with self._lock:
+                if model_id not in self._stores:
+                    self._stores[model_id] = _DiskStore(self.directory, model_id)
+        return self._stores[model_id]
+
+    def get(self, model_id, text_hash):
+        """Return the cached embedding for a text hash, or None"""
+        embedding = self.memory.get((model_id, text_hash))
+        if embedding is not None or not self.directory:
+            return embedding
+
+        try:
+            embedding = self._store(model_id).get(text_hash)
+        except (OSError, ValueError) as e:
+            print(f"Error reading embedding cache: {e}")
+            return None
+        if embedding is None:
+            self.disk_misses += 1
+            return None
+        self.disk_hits += 1
+        embedding.flags.writeable = False
+        self.memory.put((model_id, text_hash), embedding)
+        return embedding
+
+    def put_many(self, model_id, text_hashes, embeddings):
+        """Store embeddings (one row per text hash) in every tier"""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        for text_hash, embedding in zip(text_hashes, embeddings):
+            embedding = embedding.copy()
+            embedding.flags.writeable = False
+            self.memory.put((model_id, text_hash), embedding)
+        if not self.directory:
+            return
+
+        try:
+            self._store(model_id).append(list(text_hashes), embeddings)
+        except (OSError, ValueError) as e:
+            print(f"Error writing embedding cache: {e}")
+
+    def stats(self):
+        """Return hit/miss counters for both tiers"""
+        disk_lookups = self.disk_hits + self.disk_misses
+        return {
+            'memory': self.memory.stats(),
+            'disk': {
+                'enabled': bool(self.directory),
+                'rows': {model_id: len(store.rows) for model_id, store in self._stores.items()},
+                'hits': self.disk_hits,
+                'misses': self.disk_misses,
+                'hit_rate': self.disk_hits / disk_lookups if disk_lookups else 0.0
+            }
+        }
+
+# Shared cache for every component that encodes text
+embedding_cache = EmbeddingCache()
+
+def encode_texts(model, texts, model_id):
+    """
+    Encode texts through the embedding cache
+
+    Cached embeddings are reused; the remaining unique texts are encoded
+    in a single model.encode call and cached. Embeddings are L2-normalized.
+
+    Args:
+        model: SentenceTransformer (or compatible) model
+        texts: List of texts
+        model_id: Identifier of the model (and any variant) for cache keys
+
+    Returns:
+        Float32 array with one row per input text
+    """
+    texts = [str(text) if text else '' for text in texts]
+    unique = list(dict.fromkeys(texts))
+    hashes = {text: EmbeddingCache.text_hash(text) for text in unique}
+
+    embeddings = {}
+    missing = []
+    for text in unique:
+        embedding = embedding_cache.get(model_id, hashes[text])
+        if embedding is None:
+            missing.append(text)
+        else:
+            embeddings[text] = embedding
+
+    if missing:
+        encoded = np.asarray(model.encode(missing, normalize_embeddings=True), dtype=np.float32)
+        embedding_cache.put_many(model_id, [hashes[text] for text in missing], encoded)
+        for text, embedding in zip(missing, encoded):
+            embeddings[text] = embedding
+
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.stack([embeddings[text] for text in texts])
@@ -1,44 +1,52 @@
 from typing import List, Dict
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
+from app.utils.model_registry import ModelRegistry
 
 class RAGEvaluator:
-    def __init__(self):
-        # Initialize the sentence transformer model
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+    def __init__(self, quantize: bool = None):
+        # None follows EMBEDDING_QUANTIZE; True/False pins the int8 or float32 model
+        self.quantize = quantize
+
+    @property
+    def model(self):
+        """The shared sentence transformer model, loaded on first use."""
+        return ModelRegistry.get(quantize=self.quantize)
     
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Encode texts in one batch, once per unique uncached text, as L2-normalized rows."""
+        return ModelRegistry.encode(texts, quantize=self.quantize)
+
+    @staticmethod
+    def _mean_similarity(embedding: np.ndarray, context_embeddings: np.ndarray) -> float:
+        """Mean cosine similarity of one normalized embedding to each context."""
+        if not len(context_embeddings):
+            return 0.0
+        return float(np.mean(context_embeddings @ embedding))
+
     def evaluate_answer_correctness(self, answer: str, reference: str) -> float:
         """Evaluate how correct the answer is compared to the reference answer."""
-        answer_embedding = self.model.encode(answer)
-        reference_embedding = self.model.encode(reference)
-        return float(cosine_similarity([answer_embedding], [reference_embedding])[0][0])
+        answer_embedding, reference_embedding = self._embed([answer, reference])
+        return float(answer_embedding @ reference_embedding)
     
     def evaluate_answer_relevancy(self, question: str, answer: str) -> float:
         """Evaluate how relevant the answer is to the question."""
-        question_embedding = self.model.encode(question)
-        answer_embedding = self.model.encode(answer)
-        return float(cosine_similarity([question_embedding], [answer_embedding])[0][0])
+        question_embedding, answer_embedding = self._embed([question, answer])
+        return float(question_embedding @ answer_embedding)
     
     def evaluate_context_precision(self, question: str, contexts: List[str]) -> float:
         """Evaluate how precise the retrieved contexts are."""
-        question_embedding = self.model.encode(question)
-        context_embeddings = self.model.encode(contexts)
-        similarities = cosine_similarity([question_embedding], context_embeddings)[0]
-        return float(np.mean(similarities))
+        embeddings = self._embed([question] + list(contexts))
+        return self._mean_similarity(embeddings[0], embeddings[1:])
     
     def evaluate_context_recall(self, answer: str, contexts: List[str]) -> float:
         """Evaluate how well the contexts cover the answer."""
-        answer_embedding = self.model.encode(answer)
-        context_embeddings = self.model.encode(contexts)
-        similarities = cosine_similarity([answer_embedding], context_embeddings)[0]
-        return float(np.mean(similarities))
+        embeddings = self._embed([answer] + list(contexts))
+        return self._mean_similarity(embeddings[0], embeddings[1:])
     
     def evaluate_faithfulness(self, answer: str, contexts: List[str]) -> float:
         """Evaluate how faithful the answer is to the contexts."""
-        answer_embedding = self.model.encode(answer)
-        context_embeddings = self.model.encode(' '.join(contexts))
-        return float(cosine_similarity([answer_embedding], [context_embeddings])[0][0])
+        answer_embedding, context_embedding = self._embed([answer, ' '.join(contexts)])
+        return float(answer_embedding @ context_embedding)
     
     def evaluate_context_relevancy(self, question: str, contexts: List[str]) -> float:
         """Evaluate how relevant the contexts are to the question."""
@@ -57,17 +65,73 @@ class RAGEvaluator:
         Returns:
             Dict containing evaluation metrics
         """
+        # Encode every unique text once, in a single batch shared by all metrics
+        contexts = list(contexts)
+        embeddings = self._embed([question, answer, reference, ' '.join(contexts)] + contexts)
+        question_embedding, answer_embedding, reference_embedding, joined_embedding = embeddings[:4]
+        context_embeddings = embeddings[4:]
+        
+        context_precision = self._mean_similarity(question_embedding, context_embeddings)
         metrics = {
-            'answer_correctness': self.evaluate_answer_correctness(answer, reference),
-            'answer_relevancy': self.evaluate_answer_relevancy(question, answer),
-            'context_precision': self.evaluate_context_precision(question, contexts),
-            'context_recall': self.evaluate_context_recall(answer, contexts),
-            'faithfulness': self.evaluate_faithfulness(answer, contexts),
-            'context_relevancy': self.evaluate_context_relevancy(question, contexts)
+            'answer_correctness': float(answer_embedding @ reference_embedding),
+            'answer_relevancy': float(question_embedding @ answer_embedding),
+            'context_precision': context_precision,
+            'context_recall': self._mean_similarity(answer_embedding, context_embeddings),
+            'faithfulness': float(answer_embedding @ joined_embedding),
+            'context_relevancy': context_precision
         }
         
         return metrics
 
+    def evaluate_batch(self, questions: List[str], answers: List[str], references: List[str],
+                       contexts_list: List[List[str]]) -> List[Dict[str, float]]:
+        """
+        Evaluate many question-answer pairs at once.
+        
+        All texts are encoded in one batch (each unique text once), and every
+        metric is computed for all pairs with matrix operations.
+        
+        Args:
+            questions: The questions asked
+            answers: The generated answers
+            references: The reference answers
+            contexts_list: The contexts used for each answer
+            
+        Returns:
+            List of metric dicts, one per pair, as from evaluate_single_response
+        """
+        n = len(questions)
+        if not n:
+            return []
+        contexts_list = [list(contexts) for contexts in contexts_list]
+        joined = [' '.join(contexts) for contexts in contexts_list]
+        flat_contexts = [context for contexts in contexts_list for context in contexts]
+        
+        embeddings = self._embed(list(questions) + list(answers) + list(references) + joined + flat_contexts)
+        question_embeddings, answer_embeddings, reference_embeddings, joined_embeddings = (
+            embeddings[i * n:(i + 1) * n] for i in range(4))
+        context_embeddings = embeddings[4 * n:]
+        
+        # Mean similarity to each pair's own contexts, as per-pair sums over the flat context rows
+        counts = np.array([len(contexts) for contexts in contexts_list])
+        owners = np.repeat(np.arange(n), counts)
+        def mean_context_similarity(row_embeddings):
+            if not len(owners):
+                return np.zeros(n)
+            similarities = np.einsum('ij,ij->i', context_embeddings, row_embeddings[owners])
+            return np.bincount(owners, weights=similarities, minlength=n) / np.maximum(counts, 1)
+        
+        context_precision = mean_context_similarity(question_embeddings).tolist()
+        columns = {
+            'answer_correctness': np.einsum('ij,ij->i', answer_embeddings, reference_embeddings).tolist(),
+            'answer_relevancy': np.einsum('ij,ij->i', question_embeddings, answer_embeddings).tolist(),
+            'context_precision': context_precision,
+            'context_recall': mean_context_similarity(answer_embeddings).tolist(),
+            'faithfulness': np.einsum('ij,ij->i', answer_embeddings, joined_embeddings).tolist(),
+            'context_relevancy': context_precision
+        }
+        return [{metric: values[i] for metric, values in columns.items()} for i in range(n)]
+
 # Create a global evaluator instance
 evaluator = RAGEvaluator()
 
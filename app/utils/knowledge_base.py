@@ -0,0 +1,245 @@
+import hashlib
+import json
+import os
+import re
+import time
+import numpy as np
+from numpy.lib.format import open_memmap
+from app.utils.model_registry import ModelRegistry
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; rebuilds are then only locked in-process
+    fcntl = None
+
+# JSONL corpus of knowledge base passages, one {"text": ...} object per line
+RAG_KNOWLEDGE_BASE_PATH = os.getenv(
+    'RAG_KNOWLEDGE_BASE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'knowledge_base.jsonl')
+)
+
+# Directory for the passage embeddings and index files (default: index/ next to the corpus)
+RAG_INDEX_DIR = os.getenv('RAG_INDEX_DIR')
+
+# Passages encoded per model call while (re)building the embeddings
+ENCODE_CHUNK_SIZE = 256
+
+MANIFEST_VERSION = 2
+
+# Files of one build, named in the manifest
+INDEX_FILES = {
+    'embeddings': 'embeddings.npy',
+    'offsets': 'offsets.npy',
+    'hashes': 'hashes.npy',
+    'passages': 'passages.bin'
+}
+
+class KnowledgeBase:
+    """
+    File-backed knowledge base with memory-mapped passage embeddings
+
+    Passages live in a JSONL corpus. Each build copies their UTF-8 text
+    into a passages file and saves their float32 embeddings as a .npy file,
+    next to a manifest and two small index arrays (the byte offset of every
+    passage in the passages file, and the SHA-256 of its text). Startup
+    reads only the manifest and memory-maps the files, so time and memory
+    stay flat as the corpus grows, and worker processes share the mapped
+    pages.
+
+    The embeddings are rebuilt when the corpus file's size or mtime no
+    longer match the manifest. Passages whose content hash is unchanged
+    reuse their previous row; only new or edited passages are encoded.
+    Every build writes new, versioned files and the manifest is switched
+    to them, so files that running processes still map are never replaced,
+    and an edit to the corpus never changes the passages a running process
+    returns. Old builds are deleted where the OS allows it (on Windows,
+    once no process maps them any more).
+
+    kb[i] returns the text of passage i and len(kb) the number of passages.
+    """
+    def __init__(self, passages, embeddings, offsets):
+        self.passages = passages
+        self.embeddings = embeddings
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError(f"Passage {index} out of range")
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        return bytes(self.passages[start:end]).decode('utf-8')
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    @staticmethod
+    def _map_passages(path):
+        # np.memmap can't map an empty file
+        if os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=np.uint8)
+        return np.memmap(path, dtype=np.uint8, mode='r')
+
+    @staticmethod
+    def _parse(line):
+        # Text of one corpus line, or None for blank or malformed lines
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+        text = record.get('text') if isinstance(record, dict) else record
+        return text if isinstance(text, str) and text else None
+
+    @staticmethod
+    def _files(path, index_dir, model_id):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        prefix = os.path.join(index_dir, f"{stem}.{re.sub(r'[^A-Za-z0-9_.-]', '_', model_id)}")
+        files = {name: f"{prefix}.{name}" for name in ('manifest.json', 'lock')}
+        files['prefix'] = prefix
+        return files
+
+    @staticmethod
+    def _index_files(files, manifest):
+        # Paths of the files a manifest points at; manifests written before
+        # builds were versioned use fixed names
+        index_dir, stem = os.path.split(files['prefix'])
+        names = {name: f"{stem}.{suffix}" for name, suffix in INDEX_FILES.items()}
+        names.update((manifest or {}).get('files') or {})
+        return {name: os.path.join(index_dir, names[name]) for name in INDEX_FILES}
+
+    @staticmethod
+    def load(path=None, index_dir=None, quantize=None):
+        """
+        Open a knowledge base, rebuilding its embeddings if the corpus changed
+
+        Args:
+            path: JSONL corpus (default: RAG_KNOWLEDGE_BASE_PATH)
+            index_dir: Where embeddings are stored (default: RAG_INDEX_DIR)
+            quantize: Embed with the int8 quantized model (default: EMBEDDING_QUANTIZE)
+
+        Returns:
+            KnowledgeBase instance
+        """
+        path = path or RAG_KNOWLEDGE_BASE_PATH
+        index_dir = index_dir or RAG_INDEX_DIR or os.path.join(os.path.dirname(os.path.abspath(path)), 'index')
+        model_id = ModelRegistry.model_id(quantize=quantize)
+        files = KnowledgeBase._files(path, index_dir, model_id)
+        stat = os.stat(path)
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'model': model_id,
+            'corpus_size': stat.st_size,
+            'corpus_mtime_ns': stat.st_mtime_ns
+        }
+
+        os.makedirs(index_dir, exist_ok=True)
+        with open(files['lock'], 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                current = KnowledgeBase._read_manifest(files)
+                index_files = KnowledgeBase._index_files(files, current)
+                stale = current is None or {key: current.get(key) for key in manifest} != manifest
+                if stale or not all(os.path.exists(index_file) for index_file in index_files.values()):
+                    index_files = KnowledgeBase._build(path, files, quantize, index_files)
+                    manifest['files'] = {name: os.path.basename(index_files[name]) for name in INDEX_FILES}
+                    with open(files['manifest.json'] + '.tmp', 'w') as f:
+                        json.dump(manifest, f)
+                    os.replace(files['manifest.json'] + '.tmp', files['manifest.json'])
+                    KnowledgeBase._remove_stale(files, index_files)
+                # Map the files before another process can remove them
+                embeddings = np.load(index_files['embeddings'], mmap_mode='r')
+                offsets = np.load(index_files['offsets'], mmap_mode='r')
+                passages = KnowledgeBase._map_passages(index_files['passages'])
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+        return KnowledgeBase(passages, embeddings, offsets)
+
+    @staticmethod
+    def _read_manifest(files):
+        try:
+            with open(files['manifest.json']) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return manifest if isinstance(manifest, dict) else None
+
+    @staticmethod
+    def _remove_stale(files, index_files):
+        # Delete files of earlier builds. Where a file is still mapped and
+        # can't be deleted (Windows), it is retried after the next build
+        index_dir, stem = os.path.split(files['prefix'])
+        suffixes = '|'.join(re.escape(suffix) for suffix in INDEX_FILES.values())
+        pattern = re.compile(re.escape(stem) + rf"\.(build-[0-9a-f]+\.)?({suffixes})(\.tmp\.npy)?")
+        current = {os.path.basename(index_file) for index_file in index_files.values()}
+        for name in os.listdir(index_dir):
+            if name not in current and pattern.fullmatch(name):
+                try:
+                    os.remove(os.path.join(index_dir, name))
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _build(path, files, quantize, previous_files):
+        # The new build's files; the caller points the manifest at them
+        build = f"build-{time.time_ns():x}"
+        index_files = {name: f"{files['prefix']}.{build}.{suffix}" for name, suffix in INDEX_FILES.items()}
+
+        # Copy the passages out of the corpus, with their offsets and content hashes
+        offsets, hashes = [0], []
+        with open(path, 'rb') as f, open(index_files['passages'], 'wb') as out:
+            for line in f:
+                text = KnowledgeBase._parse(line)
+                if text is None:
+                    continue
+                data = text.encode('utf-8')
+                out.write(data)
+                # Passage i spans offsets[i] up to offsets[i + 1]
+                offsets.append(offsets[-1] + len(data))
+                hashes.append(hashlib.sha256(data).digest())
+        offsets = np.array(offsets, dtype=np.int64)
+        kb = KnowledgeBase(KnowledgeBase._map_passages(index_files['passages']), None, offsets)
+
+        # Rows of the previous build that can be reused, by content hash
+        previous = {}
+        old_embeddings = None
+        if os.path.exists(previous_files['hashes']) and os.path.exists(previous_files['embeddings']):
+            old_hashes = np.load(previous_files['hashes'], mmap_mode='r')
+            old_embeddings = np.load(previous_files['embeddings'], mmap_mode='r')
+            if len(old_hashes) == len(old_embeddings):
+                previous = {bytes(digest): row for row, digest in enumerate(old_hashes)}
+            del old_hashes
+
+        reused = [(i, previous[digest]) for i, digest in enumerate(hashes) if digest in previous]
+        missing = [i for i, digest in enumerate(hashes) if digest not in previous]
+        print(f"Building knowledge base embeddings for {path}: "
+              f"{len(missing)} passages to encode, {len(reused)} reused")
+
+        out = None
+        if missing:
+            encoder = ModelRegistry.encoder(quantize=quantize)
+            for start in range(0, len(missing), ENCODE_CHUNK_SIZE):
+                rows = missing[start:start + ENCODE_CHUNK_SIZE]
+                embeddings = np.asarray(encoder.encode([kb[i] for i in rows], normalize_embeddings=True),
+                                        dtype=np.float32)
+                if out is None:
+                    out = open_memmap(index_files['embeddings'], mode='w+', dtype=np.float32, shape=(len(hashes), embeddings.shape[1]))
+                out[rows] = embeddings
+        if out is None:
+            dim = old_embeddings.shape[1] if old_embeddings is not None else 0
+            out = open_memmap(index_files['embeddings'], mode='w+', dtype=np.float32, shape=(len(hashes), dim))
+        for start in range(0, len(reused), 65536):
+            new_rows, old_rows = zip(*reused[start:start + 65536])
+            out[list(new_rows)] = old_embeddings[list(old_rows)]
+        out.flush()
+        del out, old_embeddings, kb
+
+        np.save(index_files['offsets'], offsets)
+        np.save(index_files['hashes'], np.frombuffer(b''.join(hashes), dtype=np.uint8).reshape(len(hashes), 32))
+        return index_files
@@ -1,29 +1,32 @@
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from scipy.spatial.distance import cosine
+import os
 import numpy as np
-from sentence_transformers import SentenceTransformer
-
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
+from app.utils.contradiction_lexicon import ContradictionLexicon
+from app.utils.model_registry import ModelRegistry
+from app.utils.token_cache import TokenCache
+from app.utils.tokenizers import Tokenizer
+
+# How check_logical_consistency works: 'lexicon' (contradictory word pairs)
+# or 'embedding' (topically close sentences with opposite polarity)
+LOGIC_CONSISTENCY_MODE = os.getenv('LOGIC_CONSISTENCY_MODE', 'lexicon').lower()
+
+# Minimum cosine similarity for two sentences to count as making the same claim
+SELF_CONSISTENCY_THRESHOLD = float(os.getenv('SELF_CONSISTENCY_THRESHOLD', '0.75'))
 
 class LogicEvaluator:
-    model = None
+    lexicon = None
     
     @staticmethod
     def get_model():
-        """Lazy-load the sentence transformer model"""
-        if LogicEvaluator.model is None:
-            LogicEvaluator.model = SentenceTransformer('all-MiniLM-L6-v2')
-        return LogicEvaluator.model
+        """Return the shared sentence transformer model, loading it on first use"""
+        return ModelRegistry.get()
+    
+    @staticmethod
+    def get_lexicon():
+        """Lazy-load the contradiction lexicon"""
+        if LogicEvaluator.lexicon is None:
+            # Stopwords are not matched as terms, as in the original pair check
+            LogicEvaluator.lexicon = ContradictionLexicon.load(ignore=TokenCache.stopwords())
+        return LogicEvaluator.lexicon
     
     @staticmethod
     def preprocess_text(text):
@@ -31,64 +34,219 @@ class LogicEvaluator:
         if not text:
             return []
         
-        tokens = word_tokenize(text.lower())
-        stop_words = set(stopwords.words('english'))
-        return [word for word in tokens if word.isalnum() and word not in stop_words]
+        tokens = Tokenizer.word_tokenize(text.lower())
+        return TokenCache.content_words(tokens)
     
+    @staticmethod
+    def encode(texts):
+        """
+        Encode texts in a single model call
+
+        Duplicate texts are encoded once, and texts in the embedding cache
+        are not encoded at all. Embeddings are L2-normalized, so cosine
+        similarity is a plain dot product.
+
+        Args:
+            texts: List of texts
+
+        Returns:
+            Float32 array with one row per input text
+        """
+        return ModelRegistry.encode(texts)
+
+    @staticmethod
+    def similarity_matrix(texts_a, texts_b=None):
+        """
+        Calculate semantic similarity between every pair of texts
+        Both lists are encoded together in one forward pass
+
+        Args:
+            texts_a: List of texts (rows)
+            texts_b: List of texts (columns); defaults to texts_a
+
+        Returns:
+            Array of shape (len(texts_a), len(texts_b)) with scores between 0 and 1
+        """
+        texts_a = list(texts_a)
+        texts_b = texts_a if texts_b is None else list(texts_b)
+        if not texts_a or not texts_b:
+            return np.zeros((len(texts_a), len(texts_b)))
+        try:
+            embeddings = LogicEvaluator.encode(texts_a + texts_b)
+            similarity = embeddings[:len(texts_a)] @ embeddings[len(texts_a):].T
+            return np.clip(similarity.astype(float), 0, 1)  # Clamp between 0 and 1
+
+        except Exception as e:
+            print(f"Error in similarity_matrix: {e}")
+            return np.zeros((len(texts_a), len(texts_b)))
+
+    @staticmethod
+    def similarity_one_to_many(text, texts):
+        """
+        Calculate semantic similarity between one text (e.g. a question) and many
+        (e.g. every model's response) in one forward pass
+
+        Returns:
+            Array with one score between 0 and 1 per text in texts
+        """
+        return LogicEvaluator.similarity_matrix([text], texts)[0]
+
     @staticmethod
     def semantic_similarity(text1, text2):
         """
         Calculate semantic similarity between two texts
         Returns a score between 0 and 1, where 1 is perfect similarity
         """
+        return float(LogicEvaluator.similarity_one_to_many(text1, [text2])[0])
+    
+    @staticmethod
+    def find_contradictions(response):
+        """
+        Find contradictory statements in the response
+        Returns a list of hits with the token positions of each side
+        (see ContradictionLexicon.find)
+        """
+        if not response:
+            return []
+        return LogicEvaluator.get_lexicon().find(Tokenizer.word_tokenize(response.lower()))
+    
+    @staticmethod
+    def _sentence_polarity(sentences):
+        # Polarity markers per sentence: whether it contains a negation, and
+        # which side (+1 / -1) of each lexicon antonym pair it uses
+        lexicon = LogicEvaluator.get_lexicon()
+        negated = np.zeros(len(sentences), dtype=bool)
+        sides = []
+        columns = {}
+        for i, sentence in enumerate(sentences):
+            tokens = Tokenizer.word_tokenize(sentence.lower())
+            negated[i] = not lexicon.negations.isdisjoint(tokens)
+            for token in set(tokens).intersection(lexicon.index):
+                for pair_id in lexicon.index[token]:
+                    column = columns.setdefault(pair_id, len(columns))
+                    sides.append((i, column, 1 if token == lexicon.pairs[pair_id][0] else -1))
+
+        # Only pairs that occur in some sentence get a column
+        matrix = np.zeros((len(sentences), len(columns)), dtype=np.int8)
+        for i, column, side in sides:
+            matrix[i, column] = side
+        return negated, matrix
+
+    @staticmethod
+    def embed_sentences(responses):
+        """
+        Split responses into sentences and embed all of them in one batched call
+
+        Args:
+            responses: List of response texts
+
+        Returns:
+            (sentence lists, one per response; embeddings of every sentence
+            in order, or None when there are no sentences)
+        """
+        sentence_lists = [Tokenizer.sent_tokenize(response) if response else [] for response in responses]
+        sentences = [sentence for sentence_list in sentence_lists for sentence in sentence_list]
+        return sentence_lists, LogicEvaluator.encode(sentences) if sentences else None
+
+    @staticmethod
+    def find_inconsistent_sentences_batch(responses, threshold=SELF_CONSISTENCY_THRESHOLD, sentence_embeddings=None):
+        """
+        Find sentence pairs that are topically close but carry opposite polarity
+
+        The sentences of every response are embedded in one batched call;
+        each response then costs one similarity matrix product. Two sentences
+        have opposite polarity when exactly one of them is negated, or when
+        they use opposite sides of a lexicon antonym pair.
+
+        Args:
+            responses: List of response texts
+            threshold: Minimum cosine similarity for a pair to be compared
+            sentence_embeddings: Result of embed_sentences(responses), if
+                already computed
+
+        Returns:
+            List (one per response) of (sentence count, flagged pairs), where
+            each flagged pair is a dictionary with the two sentence indices
+            and their similarity
+        """
+        sentence_lists, embeddings = sentence_embeddings or LogicEvaluator.embed_sentences(responses)
+        sentences = [sentence for sentence_list in sentence_lists for sentence in sentence_list]
+        if not sentences:
+            return [(0, []) for _ in responses]
+
+        negated, sides = LogicEvaluator._sentence_polarity(sentences)
+        positive = (sides > 0).astype(np.float32)
+        negative = (sides < 0).astype(np.float32)
+
+        results = []
+        start = 0
+        for sentence_list in sentence_lists:
+            end = start + len(sentence_list)
+            block = slice(start, end)
+            start = end
+
+            similarity = embeddings[block] @ embeddings[block].T
+            opposite = negated[block, None] != negated[None, block]
+            antonyms = positive[block] @ negative[block].T
+            opposite |= (antonyms + antonyms.T) > 0
+
+            flagged = np.argwhere(np.triu((similarity >= threshold) & opposite, k=1))
+            results.append((len(sentence_list), [
+                {'sentences': [int(i), int(j)], 'similarity': round(float(similarity[i, j]), 4)}
+                for i, j in flagged
+            ]))
+        return results
+
+    @staticmethod
+    def check_self_consistency_batch(responses, threshold=SELF_CONSISTENCY_THRESHOLD, sentence_embeddings=None):
+        """
+        Score responses by embedding self-consistency
+        Deducts the lexicon penalty (0.2) for each flagged sentence pair
+        sentence_embeddings is the result of embed_sentences(responses), if already computed
+        Returns a list of scores between 0 and 1
+        """
         try:
-            model = LogicEvaluator.get_model()
-            embedding1 = model.encode([text1])[0]
-            embedding2 = model.encode([text2])[0]
-            
-            similarity = 1 - cosine(embedding1, embedding2)
-            return max(0, min(1, similarity))  # Clamp between 0 and 1
-            
+            penalty = LogicEvaluator.get_lexicon().penalty
+            scores = []
+            for sentence_count, flagged in LogicEvaluator.find_inconsistent_sentences_batch(
+                    responses, threshold, sentence_embeddings):
+                if not sentence_count:
+                    scores.append(0.5)  # Neutral score if no analyzable content
+                    continue
+                scores.append(max(0, 1.0 - len(flagged) * penalty))
+            return scores
+
         except Exception as e:
-            print(f"Error in semantic_similarity: {e}")
-            return 0.0
+            print(f"Error in check_self_consistency_batch: {e}")
+            return [0.5] * len(responses)  # Neutral score on error
     
     @staticmethod
-    def check_logical_consistency(response):
+    def check_logical_consistency(response, mode=None, tokens=None):
         """
         Check for logical consistency in the response
         This is a simplified check - in real applications, this would be more complex
+        mode is 'lexicon' or 'embedding' (default: LOGIC_CONSISTENCY_MODE)
+        tokens are the response's lowercased word tokens, if already tokenized
         Returns a score between 0 and 1
         """
+        if (mode or LOGIC_CONSISTENCY_MODE) == 'embedding':
+            return LogicEvaluator.check_self_consistency_batch([response])[0]
+        
         try:
-            # Define contradictory phrase pairs (simplified)
-            contradictions = [
-                ("increase", "decrease"),
-                ("more", "less"),
-                ("larger", "smaller"),
-                ("higher", "lower"),
-                ("true", "false"),
-                ("correct", "incorrect"),
-                ("yes", "no"),
-                ("positive", "negative"),
-                ("always", "never")
-            ]
-            
-            # Tokenize response
-            tokens = LogicEvaluator.preprocess_text(response)
-            if not tokens:
+            # Tokenize response once for both the content check and the lexicon
+            if tokens is None:
+                tokens = Tokenizer.word_tokenize(response.lower()) if response else []
+            if not TokenCache.content_words(tokens):
                 return 0.5  # Neutral score if no analyzable content
             
             # Check for contradictions
-            found_contradictions = 0
-            for pair in contradictions:
-                if pair[0] in tokens and pair[1] in tokens:
-                    found_contradictions += 1
+            lexicon = LogicEvaluator.get_lexicon()
+            found_contradictions = len(lexicon.find(tokens))
             
             # Calculate consistency score
-            consistency_score = 1.0 - (found_contradictions * 0.2)  # Deduct 0.2 for each contradiction
+            consistency_score = 1.0 - (found_contradictions * lexicon.penalty)  # Deduct the penalty (0.2) for each contradiction
             return max(0, consistency_score)  # Ensure it's not negative
             
         except Exception as e:
             print(f"Error in check_logical_consistency: {e}")
-            return 0.5  # Neutral score on error 
\ No newline at end of file
+            return 0.5  # Neutral score on error 
@@ -0,0 +1,93 @@
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+class LRUCache:
+    """
+    Thread-safe bounded mapping with least-recently-used eviction
+
+    Keeps hit, miss and eviction counters so callers can report how well
+    the cache is doing. If sizeof is given (a function of key and value
+    returning bytes), the memory held by entries is tracked too.
+    """
+    def __init__(self, maxsize=10000, sizeof=None):
+        self.maxsize = max(int(maxsize), 1)
+        self.sizeof = sizeof
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        """Return the cached value for key (marking it recently used), or default"""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store value under key, evicting the least recently used entries if full"""
+        with self._lock:
+            if self.sizeof is not None:
+                if key in self._data:
+                    self.bytes -= self.sizeof(key, self._data[key])
+                self.bytes += self.sizeof(key, value)
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                evicted_key, evicted = self._data.popitem(last=False)
+                if self.sizeof is not None:
+                    self.bytes -= self.sizeof(evicted_key, evicted)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for key, computing and storing it on a miss
+
+        compute() runs outside the lock, so two threads missing on the same
+        key may both compute it; the last one to finish wins.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """Return size and hit/miss counters (and memory, if tracked) as a dictionary"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+            if self.sizeof is not None:
+                stats['bytes'] = self.bytes
+            return stats
@@ -1,9 +1,150 @@
-import sympy
+import ast
+import operator
+import os
 import re
-from sympy.parsing.sympy_parser import parse_expr
-from sympy.core.sympify import SympifyError
+import sys
+from fractions import Fraction
+import numpy as np
+from app.utils.lru_cache import LRUCache
+from app.utils.math_sandbox import get_sandbox
+
+# Number of evaluated expressions cached by normalized form
+MATH_CACHE_SIZE = int(os.getenv('MATH_CACHE_SIZE', '10000'))
+
+# Number of canonical symbolic forms cached by normalized expression
+MATH_CANONICAL_CACHE_SIZE = int(os.getenv('MATH_CANONICAL_CACHE_SIZE', '5000'))
+
+# How math validity is judged: 'numeric' (compare values) or 'symbolic'
+# (algebraic questions are also compared by canonical form, so (x+1)^2
+# and x^2+2x+1 match)
+MATH_VALIDITY_MODE = os.getenv('MATH_VALIDITY_MODE', 'numeric').lower()
+
+# Expressions with a larger literal exponent, or more digits in one number, are not evaluated
+MATH_MAX_EXPONENT = int(os.getenv('MATH_MAX_EXPONENT', '10000'))
+MATH_MAX_DIGITS = int(os.getenv('MATH_MAX_DIGITS', '100'))
+
+# Expressions whose powers together could produce more bits than this are not evaluated
+MATH_MAX_POWER_BITS = int(os.getenv('MATH_MAX_POWER_BITS', str(1 << 20)))
+
+# Largest intermediate result (in bits) the fast path computes itself; bigger ones go to SymPy
+FAST_MAX_BITS = 1 << 16
+
+# Characters between a final-answer cue ("the result is", "=") and a number it introduces
+ANSWER_CUE_WINDOW = 16
+
+_NUMBER = r"\d+(?:,\d{3})*(?:\.\d+)?"
+_OPERAND = r"\(?[-+]?" + _NUMBER + r"\)?"
+
+# One pass finds final-answer cues and numbers/arithmetic expressions. Strong
+# cues name the answer; weak cues ("is", "are") also introduce intermediate
+# values ("2*3 is 6") and only count when the text has no strong cue.
+# Each repetition must consume an operator and an operand, so matching is linear.
+_CANDIDATE_RE = re.compile(
+    r"(?P<cue>\b(?:answer|result|total|equals?|gives|makes)\b|=)"
+    r"|(?P<weak_cue>\b(?:sum|product|is|are)\b)"
+    r"|(?P<expr>" + _OPERAND + r"(?:\s*[-+*/^×÷]\s*" + _OPERAND + r")*)",
+    re.IGNORECASE
+)
+_PLAIN_NUMBER_RE = re.compile(r"[-+]?" + _NUMBER)
+
+# Algebraic expressions: numbers, single-letter lowercase variables and operators.
+# A letter hyphenated to a word ("e-mail", "x-ray") is not a variable.
+_SYMBOLIC_RE = re.compile(
+    r"(?:(?<![A-Za-z])(?<![A-Za-z]-)[a-z](?![A-Za-z]|-[A-Za-z])|\d+(?:\.\d+)?|[()^*/+\-×÷]|[ \t])+")
+# Implicit products ("2x", "xy", "(x+1)(x-1)") made explicit before parsing
+_IMPLICIT_PRODUCT_RE = re.compile(r"(?<=[\da-z)])(?=[a-z(])")
+_OPERATOR_RE = re.compile(r"[-+*/^×÷]")
+_VARIABLE_RE = re.compile(r"[a-z]")
+
+_DIGITS_RE = re.compile(r'\d+')
+_EXPONENT_RE = re.compile(r'\*\*\(?[-+]?(\d+)')
+
+_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv
+}
+_UNARY_OPS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg
+}
+
+class _Unsupported(Exception):
+    """Raised when an expression is not plain arithmetic the fast path can handle"""
+
+def _fast_value(node):
+    # Exact rational arithmetic over a restricted AST: numbers, + - * / **,
+    # unary signs and parentheses. Anything else is left to SymPy.
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        # Go through the literal's text so 0.1 is exactly 1/10
+        return Fraction(repr(node.value)) if isinstance(node.value, float) else Fraction(node.value)
+    if isinstance(node, ast.BinOp):
+        left = _fast_value(node.left)
+        right = _fast_value(node.right)
+        if isinstance(node.op, ast.Pow):
+            if right.denominator != 1 or (left == 0 and right < 0):
+                raise _Unsupported()
+            if abs(right) * max(left.numerator.bit_length(), left.denominator.bit_length()) > FAST_MAX_BITS:
+                raise _Unsupported()
+            return _bounded(left ** int(right))
+        if type(node.op) not in _BINARY_OPS or (isinstance(node.op, ast.Div) and right == 0):
+            raise _Unsupported()
+        return _bounded(_BINARY_OPS[type(node.op)](left, right))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        return _UNARY_OPS[type(node.op)](_fast_value(node.operand))
+    raise _Unsupported()
+
+def _bounded(value):
+    # Stop growing products and sums (e.g. a long chain of 9**9999 terms)
+    # before each step gets slow; the expression then goes to SymPy
+    if max(value.numerator.bit_length(), value.denominator.bit_length()) > FAST_MAX_BITS:
+        raise _Unsupported()
+    return value
+
+def _bit_estimate(node):
+    # Upper bound on the bits of a subexpression's value built from its literals
+    bits = 0
+    for child in ast.walk(node):
+        if isinstance(child, ast.Constant) and type(child.value) in (int, float):
+            value = Fraction(repr(child.value)) if isinstance(child.value, float) else Fraction(child.value)
+            bits += max(value.numerator.bit_length(), value.denominator.bit_length()) + 1
+    return bits
+
+def _is_algebraic(normalized):
+    # Whether a normalized expression parses as numbers, single-letter
+    # variables, + - * / ** and parentheses
+    try:
+        tree = ast.parse(_IMPLICIT_PRODUCT_RE.sub('*', normalized), mode='eval')
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        return False
+    for node in ast.walk(tree.body):
+        if isinstance(node, ast.Name):
+            if len(node.id) != 1:
+                return False
+        elif isinstance(node, ast.Constant):
+            if type(node.value) not in (int, float):
+                return False
+        elif not isinstance(node, (ast.BinOp, ast.UnaryOp, ast.operator, ast.unaryop, ast.Load)):
+            return False
+    return True
+
+def _contains_pow(node):
+    return any(isinstance(child, ast.BinOp) and isinstance(child.op, ast.Pow) for child in ast.walk(node))
+
+def _constant_value(node):
+    # Value of a number literal, optionally signed, or None
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        node = node.operand
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    return None
 
 class MathEvaluator:
+    _results = LRUCache(MATH_CACHE_SIZE)
+    _canonical = LRUCache(MATH_CANONICAL_CACHE_SIZE,
+                          sizeof=lambda key, value: sys.getsizeof(key) + sys.getsizeof(value))
+
     @staticmethod
     def extract_math_expression(text):
         """Extract potential mathematical expressions from text"""
@@ -18,6 +159,109 @@ class MathEvaluator:
             return max(expressions, key=len).strip()
         return None
     
+    @staticmethod
+    def extract_symbolic_expression(text):
+        """
+        Extract the longest algebraic expression from text
+
+        Only well-formed expressions with at least one single-letter variable
+        and one operator are considered, e.g. '(x+1)^2' or 'x^2 + 2x + 1'.
+        """
+        expressions = [match.group().strip() for match in _SYMBOLIC_RE.finditer(text or '')]
+        expressions = [expression for expression in expressions
+                       if _VARIABLE_RE.search(expression) and _OPERATOR_RE.search(expression)
+                       and _is_algebraic(MathEvaluator.normalize_expression(expression))]
+        if expressions:
+            return max(expressions, key=len)
+        return None
+
+    @staticmethod
+    def scan_candidates(text):
+        """
+        Find every candidate answer (number or arithmetic expression) in one pass
+
+        Returns:
+            List of candidates in order of appearance, each a dictionary with
+            the expression 'text', its 'position' and the 'cue' it directly
+            follows: 'strong' ("the result is", "="), 'weak' ("is") or None
+        """
+        candidates = []
+        cue_end = weak_cue_end = None
+        for match in _CANDIDATE_RE.finditer(text or ''):
+            if match.group('cue'):
+                cue_end = match.end()
+                continue
+            if match.group('weak_cue'):
+                weak_cue_end = match.end()
+                continue
+            expression = match.group('expr').strip()
+            # Drop parentheses cut off at the edges of the match
+            if expression.count('(') != expression.count(')'):
+                expression = expression.lstrip('(').rstrip(')')
+            if cue_end is not None and match.start() - cue_end <= ANSWER_CUE_WINDOW:
+                cue = 'strong'
+            elif weak_cue_end is not None and match.start() - weak_cue_end <= ANSWER_CUE_WINDOW:
+                cue = 'weak'
+            else:
+                cue = None
+            candidates.append({
+                'text': expression.replace(',', ''),
+                'position': match.start(),
+                'cue': cue
+            })
+            cue_end = weak_cue_end = None
+        return candidates
+
+    @staticmethod
+    def rank_candidates(text):
+        """
+        Rank candidate answers from most to least likely to be the final answer
+
+        Candidates following a strong final-answer cue come first (the last
+        one first); only if there are none, those following a weak cue. Then
+        the last number in the text, then the longest expression, then the
+        rest from last to first.
+        """
+        candidates = MathEvaluator.scan_candidates(text)
+        if not candidates:
+            return []
+        last = len(candidates) - 1
+        longest = max(range(len(candidates)), key=lambda i: len(candidates[i]['text']))
+        cues = {candidate['cue'] for candidate in candidates}
+        answer_cue = 'strong' if 'strong' in cues else 'weak'
+        def rank(i):
+            if candidates[i]['cue'] == answer_cue:
+                return (0, -i)
+            if i == last:
+                return (1, 0)
+            if i == longest:
+                return (2, 0)
+            return (3, -i)
+        return [candidates[i] for i in sorted(range(len(candidates)), key=rank)]
+
+    @staticmethod
+    def candidate_value(candidate):
+        """Evaluate a candidate, parsing plain numbers directly"""
+        expression = candidate['text']
+        if _PLAIN_NUMBER_RE.fullmatch(expression):
+            return float(expression)
+        return MathEvaluator.evaluate_math_expression(expression)
+
+    @staticmethod
+    def find_answer(response):
+        """
+        Return the value of the highest-ranked candidate answer that evaluates
+
+        Returns:
+            (candidate found, value or None)
+        """
+        candidates = MathEvaluator.rank_candidates(response)
+        for candidate in candidates:
+            value = MathEvaluator.candidate_value(candidate)
+            if value is not None:
+                return True, value
+        return bool(candidates), None
+
     @staticmethod
     def normalize_expression(expression):
         """Normalize mathematical expressions for comparison"""
@@ -36,58 +280,260 @@ class MathEvaluator:
         return expression
     
     @staticmethod
-    def evaluate_math_expression(expression):
-        """Evaluate a mathematical expression and return the result"""
+    def exceeds_limits(normalized):
+        """
+        Check an expression against the size limits before evaluating it
+
+        Rejects numbers longer than MATH_MAX_DIGITS digits, literal exponents
+        above MATH_MAX_EXPONENT (also when the exponent is itself arithmetic,
+        as in 9**9**9), exponent towers too large to bound and
+        expressions whose powers together could exceed MATH_MAX_POWER_BITS
+        bits (e.g. hundreds of 9**9999 terms), which can't be evaluated in
+        reasonable time or memory.
+
+        Returns:
+            A description of the violated limit, or None if within limits
+        """
+        if any(len(digits) > MATH_MAX_DIGITS for digits in _DIGITS_RE.findall(normalized)):
+            return f"number longer than {MATH_MAX_DIGITS} digits"
+
+        try:
+            tree = ast.parse(normalized, mode='eval')
+        except (SyntaxError, ValueError, RecursionError, MemoryError):
+            # Not Python syntax; only the literal exponents can be checked
+            if any(int(exponent) > MATH_MAX_EXPONENT for exponent in _EXPONENT_RE.findall(normalized)):
+                return f"exponent larger than {MATH_MAX_EXPONENT}"
+            return None
+
+        power_bits = 0
+        for node in ast.walk(tree):
+            if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+                exponent = _constant_value(node.right)
+                if exponent is None:
+                    # Arithmetic exponents (2**3**2) are evaluated within the fast path's
+                    # bounds; towers beyond them (9**9**9**9) are rejected
+                    try:
+                        exponent = _fast_value(node.right)
+                    except (_Unsupported, ArithmeticError):
+                        if _contains_pow(node.right):
+                            return "nested exponent"
+                if exponent is not None and abs(exponent) > MATH_MAX_EXPONENT:
+                    return f"exponent larger than {MATH_MAX_EXPONENT}"
+                if exponent is not None:
+                    power_bits += abs(exponent) * _bit_estimate(node.left)
+        if power_bits > MATH_MAX_POWER_BITS:
+            return f"powers larger than {MATH_MAX_POWER_BITS} bits in total"
+        return None
+
+    @staticmethod
+    def fast_evaluate(normalized):
+        """
+        Evaluate plain arithmetic without SymPy
+
+        Only numbers, + - * / **, unary signs and parentheses are accepted,
+        via a restricted AST walk with exact rational arithmetic. The result
+        matches SymPy's within float rounding: SymPy keeps decimal literals
+        as floats, so e.g. 0.1+0.2 gives 0.3 here and 0.30000000000000004
+        there. Scoring compares values with a 1e-6 tolerance.
+
+        Returns:
+            The result as a float, or None if the expression is not plain arithmetic
+        """
+        try:
+            tree = ast.parse(normalized, mode='eval')
+            return float(_fast_value(tree.body))
+        except (_Unsupported, SyntaxError, ValueError, OverflowError, RecursionError):
+            return None
+
+    @staticmethod
+    def _sympy_evaluate(normalized, expression):
+        # SymPy is only imported for expressions the fast path rejects
+        from sympy.parsing.sympy_parser import parse_expr
+        from sympy.core.sympify import SympifyError
         try:
-            normalized = MathEvaluator.normalize_expression(expression)
-            if not normalized:
-                return None
-                
             result = parse_expr(normalized)
             return float(result.evalf())
         except (SympifyError, ValueError, TypeError) as e:
             print(f"Error evaluating expression '{expression}': {e}")
             return None
+
+    @staticmethod
+    def _sympy_canonical(normalized):
+        # Canonical form: simplified, then expanded, as a SymPy srepr string
+        import sympy
+        from sympy.parsing.sympy_parser import (parse_expr, standard_transformations,
+                                                implicit_multiplication_application)
+        from sympy.core.sympify import SympifyError
+        try:
+            expr = parse_expr(normalized, transformations=standard_transformations +
+                              (implicit_multiplication_application,))
+            return sympy.srepr(sympy.expand(sympy.simplify(expr)))
+        except (SympifyError, ValueError, TypeError, SyntaxError, AttributeError) as e:
+            print(f"Error canonicalizing expression '{normalized}': {e}")
+            return None
+
+    @staticmethod
+    def canonical_form(expression):
+        """
+        Return the canonical symbolic form of an expression, cached by normalized expression
+
+        Simplification is expensive, so forms are kept in a bounded LRU cache
+        and computed in the math sandbox on a miss.
+
+        Returns:
+            A string that is equal for algebraically equivalent expressions, or None
+        """
+        normalized = MathEvaluator.normalize_expression(expression)
+        if not normalized:
+            return None
+
+        def compute():
+            reason = MathEvaluator.exceeds_limits(normalized)
+            if reason:
+                print(f"Not canonicalizing expression '{expression}': {reason}")
+                return None
+            sandbox = get_sandbox()
+            if sandbox is not None:
+                return sandbox.canonical(normalized)
+            return MathEvaluator._sympy_canonical(normalized)
+        return MathEvaluator._canonical.get_or_compute(normalized, compute)
+
+    @staticmethod
+    def symbolic_equivalent(expression1, expression2):
+        """Check whether two expressions are algebraically equivalent"""
+        form1 = MathEvaluator.canonical_form(expression1)
+        return form1 is not None and form1 == MathEvaluator.canonical_form(expression2)
+
+    @staticmethod
+    def evaluate_math_expression(expression):
+        """Evaluate a mathematical expression and return the result"""
+        normalized = MathEvaluator.normalize_expression(expression)
+        if not normalized:
+            return None
+
+        def compute():
+            reason = MathEvaluator.exceeds_limits(normalized)
+            if reason:
+                print(f"Not evaluating expression '{expression}': {reason}")
+                return None
+
+            result = MathEvaluator.fast_evaluate(normalized)
+            if result is None:
+                # SymPy runs in the sandbox so pathological input can't hang
+                # or exhaust the request worker
+                sandbox = get_sandbox()
+                if sandbox is not None:
+                    result = sandbox.evaluate(normalized, expression)
+                else:
+                    result = MathEvaluator._sympy_evaluate(normalized, expression)
+            return result
+        return MathEvaluator._results.get_or_compute(normalized, compute)
+
+    @staticmethod
+    def cache_stats():
+        """Return hit/miss counters for the expression result cache"""
+        return MathEvaluator._results.stats()
+
+    @staticmethod
+    def canonical_cache_stats():
+        """Return hit/miss counters and memory use for the canonical form cache"""
+        return MathEvaluator._canonical.stats()
     
     @staticmethod
-    def check_math_validity(response, question):
+    def check_math_validity_batch(responses, question, mode=None):
         """
-        Check the mathematical validity of a response
-        Returns a score between 0 and 1
+        Check the mathematical validity of many responses to one question
+        The question's expression is extracted and evaluated once; each
+        response's final answer is found with a single scan (see
+        rank_candidates), and all answers are compared against the expected
+        value in one vectorized pass
+        In 'symbolic' mode (default: MATH_VALIDITY_MODE), questions with an
+        algebraic expression that SymPy can simplify are scored by symbolic
+        equivalence instead; other questions are scored numerically
+        Returns a list of scores between 0 and 1, identical to calling
+        check_math_validity for each response
         """
+        responses = list(responses)
+        if (mode or MATH_VALIDITY_MODE) == 'symbolic':
+            question_expr = MathEvaluator.extract_symbolic_expression(question)
+            expected_form = None
+            if question_expr:
+                try:
+                    expected_form = MathEvaluator.canonical_form(question_expr)
+                except Exception as e:
+                    print(f"Error in check_math_validity: {e}")
+            if expected_form is not None:
+                return MathEvaluator._symbolic_validity_batch(responses, expected_form)
+
         try:
-            # Extract expressions from question and response
+            # Extract and evaluate the question's expression once
             question_expr = MathEvaluator.extract_math_expression(question)
-            response_expr = MathEvaluator.extract_math_expression(response)
-            
-            # If we couldn't extract expressions, give a 0 score
-            if not question_expr or not response_expr:
-                return 0
-            
-            # Evaluate both expressions
+            if not question_expr:
+                return [0] * len(responses)
             expected_result = MathEvaluator.evaluate_math_expression(question_expr)
-            actual_result = MathEvaluator.evaluate_math_expression(response_expr)
-            
-            # If either couldn't be evaluated, give a 0 score
-            if expected_result is None or actual_result is None:
-                # Check if the response directly contains the correct result
-                if str(expected_result) in response:
-                    return 1.0
-                return 0
-            
-            # Check how close the results are
-            if abs(expected_result - actual_result) < 1e-6:  # Allow for floating point errors
-                return 1.0
-            
-            # If the number is close, give partial credit
-            relative_diff = abs(expected_result - actual_result) / max(abs(expected_result), 1e-10)
-            if relative_diff < 0.1:
-                return 0.8  # Within 10% of correct answer
-            elif relative_diff < 0.2:
-                return 0.5  # Within 20% of correct answer
-            
-            return 0.0  # Incorrect answer
-            
         except Exception as e:
             print(f"Error in check_math_validity: {e}")
-            return 0.0 
\ No newline at end of file
+            return [0.0] * len(responses)
+
+        scores = [0.0] * len(responses)
+        actual = np.full(len(responses), np.nan)
+        compared = np.zeros(len(responses), dtype=bool)
+        for i, response in enumerate(responses):
+            try:
+                # Use the response's most likely final answer
+                found, actual_result = MathEvaluator.find_answer(response)
+                
+                # If we couldn't extract an expression, give a 0 score
+                if not found:
+                    scores[i] = 0
+                    continue
+                
+                # If either couldn't be evaluated, give a 0 score
+                if expected_result is None or actual_result is None:
+                    # Check if the response directly contains the correct result
+                    scores[i] = 1.0 if str(expected_result) in response else 0
+                    continue
+                
+                actual[i] = actual_result
+                compared[i] = True
+            except Exception as e:
+                print(f"Error in check_math_validity: {e}")
+        
+        if compared.any():
+            # Check how close the results are, giving partial credit for close numbers
+            with np.errstate(invalid='ignore', over='ignore'):
+                diff = np.abs(expected_result - actual)
+                relative_diff = diff / max(abs(expected_result), 1e-10)
+            band = np.select(
+                [diff < 1e-6, relative_diff < 0.1, relative_diff < 0.2],  # Exact (floating point errors), within 10%, within 20%
+                [1.0, 0.8, 0.5],
+                default=0.0
+            )
+            for i in np.flatnonzero(compared):
+                scores[i] = float(band[i])
+        
+        return scores
+    
+    @staticmethod
+    def _symbolic_validity_batch(responses, expected_form):
+        # Full credit for answers algebraically equivalent to the question's
+        # expression (given by its canonical form); canonical forms are
+        # cached, so repeated questions and answers skip simplification
+        scores = []
+        for response in responses:
+            try:
+                response_expr = MathEvaluator.extract_symbolic_expression(response)
+                equivalent = response_expr is not None and MathEvaluator.canonical_form(response_expr) == expected_form
+                scores.append(1.0 if equivalent else 0.0)
+            except Exception as e:
+                print(f"Error in check_math_validity: {e}")
+                scores.append(0.0)
+        return scores
+
+    @staticmethod
+    def check_math_validity(response, question, mode=None):
+        """
+        Check the mathematical validity of a response
+        Returns a score between 0 and 1
+        """
+        return MathEvaluator.check_math_validity_batch([response], question, mode)[0]
@@ -0,0 +1,210 @@
+import atexit
+import multiprocessing
+import os
+import queue
+import threading
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; the memory cap is skipped there
+    resource = None
+
+# Worker processes used for SymPy evaluation; 0 evaluates in-process without limits
+MATH_SANDBOX_WORKERS = int(os.getenv('MATH_SANDBOX_WORKERS', '2'))
+
+# Seconds an expression may run before its worker is killed and replaced
+MATH_SANDBOX_TIMEOUT = float(os.getenv('MATH_SANDBOX_TIMEOUT', '2.0'))
+
+# Address space cap for each worker process, in MB
+MATH_SANDBOX_MEMORY_MB = int(os.getenv('MATH_SANDBOX_MEMORY_MB', '512'))
+
+# Seconds a new worker may take to start before it is killed and replaced
+MATH_SANDBOX_START_TIMEOUT = float(os.getenv('MATH_SANDBOX_START_TIMEOUT', '10.0'))
+
+def _start_context():
+    # Fork workers from a server process with SymPy already imported, so
+    # replacements start quickly; spawn where forkserver isn't available
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['app.utils.math_evaluator', 'sympy.parsing.sympy_parser'])
+        return context
+    return multiprocessing.get_context('spawn')
+
+def _worker_main(conn, memory_mb):
+    # Import SymPy before capping memory so the cap only bounds evaluation
+    from app.utils.math_evaluator import MathEvaluator
+    tasks = {
+        'evaluate': MathEvaluator._sympy_evaluate,
+        'canonical': MathEvaluator._sympy_canonical
+    }
+    MathEvaluator._sympy_evaluate('1+1', '1+1')
+    if resource is not None and memory_mb > 0:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    try:
+        conn.send(('ready', None))
+    except OSError:
+        return  # The parent gave up on this worker while it was starting
+
+    while True:
+        try:
+            task, args = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        try:
+            conn.send(('ok', tasks[task](*args)))
+        except MemoryError:
+            conn.send(('memory', None))
+        except Exception as e:
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+
+class _Worker:
+    def __init__(self, context, memory_mb):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, memory_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+class MathSandbox:
+    """
+    Reusable pool of worker processes that run SymPy work under limits
+
+    Each evaluation is bounded by a wall-clock timeout, and each worker by
+    an address space cap. A worker that times out, runs out of memory or
+    dies is killed and replaced, and the caller gets None (which scores 0)
+    instead of an error. Callers block while all workers are busy.
+    """
+    def __init__(self, workers=MATH_SANDBOX_WORKERS, timeout=MATH_SANDBOX_TIMEOUT,
+                 memory_mb=MATH_SANDBOX_MEMORY_MB, start_timeout=MATH_SANDBOX_START_TIMEOUT):
+        self.workers = max(int(workers), 1)
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.start_timeout = start_timeout
+        self._context = _start_context()
+        self._idle = None
+        self._lock = threading.Lock()
+        self.evaluations = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.restarts = 0
+
+    def _start(self):
+        if self._idle is None:
+            with self._lock:
+                if self._idle is None:
+                    idle = queue.Queue()
+                    for _ in range(self.workers):
+                        idle.put(_Worker(self._context, self.memory_mb))
+                    self._idle = idle
+        return self._idle
+
+    def _replace(self, worker):
+        worker.kill()
+        self.restarts += 1
+        return _Worker(self._context, self.memory_mb)
+
+    def evaluate(self, normalized, expression):
+        """
+        Evaluate a normalized expression in a worker process
+
+        Returns:
+            The result as a float, or None if evaluation failed, timed out
+            or exceeded the memory cap
+        """
+        return self.run('evaluate', normalized, expression, label=expression)
+
+    def canonical(self, normalized):
+        """
+        Compute the canonical SymPy form of a normalized expression in a worker process
+
+        Returns:
+            The canonical form as a string, or None on failure or timeout
+        """
+        return self.run('canonical', normalized, label=normalized)
+
+    def run(self, task, *args, label=''):
+        """Run a sandbox task ('evaluate' or 'canonical') under the limits"""
+        idle = self._start()
+        worker = idle.get()
+        try:
+            if not worker.ready:
+                # Startup (starting the process and importing SymPy) isn't charged
+                # to the timeout, but is bounded by its own deadline
+                if not worker.conn.poll(self.start_timeout):
+                    self.failures += 1
+                    print(f"Math worker did not start within {self.start_timeout}s")
+                    worker = self._replace(worker)
+                    return None
+                worker.conn.recv()
+                worker.ready = True
+
+            self.evaluations += 1
+            worker.conn.send((task, args))
+            if not worker.conn.poll(self.timeout):
+                self.timeouts += 1
+                print(f"Math {task} of '{label}' timed out after {self.timeout}s")
+                worker = self._replace(worker)
+                return None
+
+            status, result = worker.conn.recv()
+            if status == 'ok':
+                return result
+            self.failures += 1
+            print(f"Math {task} of '{label}' failed: {status} {result or ''}".rstrip())
+            if status == 'memory':
+                worker = self._replace(worker)
+            return None
+
+        except (EOFError, OSError) as e:
+            # The worker died, e.g. killed by the memory cap
+            self.failures += 1
+            print(f"Math worker died during {task} of '{label}': {e}")
+            worker = self._replace(worker)
+            return None
+        finally:
+            idle.put(worker)
+
+    def stats(self):
+        """Return evaluation, timeout and restart counters"""
+        return {
+            'workers': self.workers,
+            'timeout': self.timeout,
+            'memory_mb': self.memory_mb,
+            'start_timeout': self.start_timeout,
+            'evaluations': self.evaluations,
+            'timeouts': self.timeouts,
+            'failures': self.failures,
+            'restarts': self.restarts
+        }
+
+    def shutdown(self):
+        """Stop all worker processes"""
+        with self._lock:
+            if self._idle is not None:
+                while True:
+                    try:
+                        self._idle.get_nowait().kill()
+                    except queue.Empty:
+                        break
+                self._idle = None
+
+_sandbox = None
+_sandbox_lock = threading.Lock()
+
+def get_sandbox():
+    """Return the process-wide math sandbox, or None if MATH_SANDBOX_WORKERS is 0"""
+    global _sandbox
+    if MATH_SANDBOX_WORKERS <= 0:
+        return None
+    if _sandbox is None:
+        with _sandbox_lock:
+            if _sandbox is None:
+                _sandbox = MathSandbox()
+                atexit.register(_sandbox.shutdown)
+    return _sandbox
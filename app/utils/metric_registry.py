@@ -0,0 +1,250 @@
+import re
+from app.utils.nlp_evaluator import NLPEvaluator
+from app.utils.logic_evaluator import LogicEvaluator, LOGIC_CONSISTENCY_MODE
+from app.utils.math_evaluator import MathEvaluator
+from app.utils.tokenizers import Tokenizer
+
+# Metrics returned when a caller doesn't ask for specific ones
+DEFAULT_METRICS = ('coherence', 'token_overlap', 'length_ratio', 'overall_score')
+
+# Metrics every saved evaluation must include; the leaderboard averages them
+CORE_METRICS = DEFAULT_METRICS
+
+_GREETING_RE = re.compile(r"^\W*(hi|hello|hey|greetings|good (morning|afternoon|evening)|thanks|thank you)\b",
+                          re.IGNORECASE)
+_MATH_RE = re.compile(r"\d\s*[-+*/^×÷]\s*[\d(]|\b(calculate|compute|solve|sum of|product of|square root)\b",
+                      re.IGNORECASE)
+
+class Metric:
+    """
+    A registered metric
+
+    Args:
+        name: Key the metric's value is returned under
+        compute: Function taking a MetricContext and returning one value per response
+        cost: Relative cost per response; cheaper metrics run first
+        requires: Analysis stages the metric reads (see MetricRegistry.STAGES)
+        question_types: Question types the metric applies to, or None for all
+        description: Short description for the metric listing
+    """
+    def __init__(self, name, compute, cost=1, requires=(), question_types=None, description=''):
+        self.name = name
+        self.compute = compute
+        self.cost = cost
+        self.requires = tuple(requires)
+        self.question_types = tuple(question_types) if question_types else None
+        self.description = description
+
+    def applies_to(self, question_type):
+        return self.question_types is None or question_type in self.question_types
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'cost': self.cost,
+            'requires': list(self.requires),
+            'question_types': list(self.question_types) if self.question_types else None,
+            'description': self.description
+        }
+
+class MetricContext:
+    """
+    One question scored against many responses
+
+    Analysis stages are computed the first time a metric asks for them and
+    shared by every metric afterwards, so stages no requested metric needs
+    never run. metrics names the metrics being computed, so a stage can
+    skip work only other metrics would use.
+    """
+    def __init__(self, question, responses, executor=None, metrics=None):
+        self.question = question
+        self.responses = list(responses)
+        self.executor = executor
+        self.metrics = tuple(metrics) if metrics is not None else tuple(MetricRegistry._metrics)
+        self._stages = {}
+
+    def stage(self, name):
+        if name not in self._stages:
+            self._stages[name] = MetricRegistry.STAGES[name](self)
+        return self._stages[name]
+
+def _tokens_stage(ctx):
+    # Shared tokenization and the requested NLP metrics built on it, cached and vectorized
+    metrics = [name for name in NLPEvaluator.METRICS if name in ctx.metrics]
+    return NLPEvaluator.evaluate_batch(ctx.question, ctx.responses, executor=ctx.executor, metrics=metrics)
+
+def _words_stage(ctx):
+    # Lowercased word tokens of every response
+    return [Tokenizer.word_tokenize(response.lower()) if response else [] for response in ctx.responses]
+
+def _embeddings_stage(ctx):
+    # The question and every non-empty response are encoded in one forward pass
+    scored = [i for i, response in enumerate(ctx.responses) if response]
+    similarities = LogicEvaluator.similarity_one_to_many(ctx.question, [ctx.responses[i] for i in scored])
+    values = [0.0] * len(ctx.responses)
+    for i, similarity in zip(scored, similarities):
+        values[i] = float(similarity)
+    return values
+
+def _sentence_embeddings_stage(ctx):
+    # Sentences of all responses are embedded in one forward pass
+    try:
+        return LogicEvaluator.embed_sentences(ctx.responses)
+    except Exception as e:
+        print(f"Error in sentence embeddings stage: {e}")
+        return None
+
+def _math_stage(ctx):
+    # The question's expression is parsed and evaluated once for all responses
+    scores = MathEvaluator.check_math_validity_batch(ctx.responses, ctx.question)
+    return [score if response else 0.0 for response, score in zip(ctx.responses, scores)]
+
+def _logical_consistency(ctx):
+    if LOGIC_CONSISTENCY_MODE == 'embedding':
+        return _self_consistency(ctx)
+    return [LogicEvaluator.check_logical_consistency(response, tokens=tokens) if response else 0.0
+            for response, tokens in zip(ctx.responses, ctx.stage('words'))]
+
+def _self_consistency(ctx):
+    sentence_embeddings = ctx.stage('sentence_embeddings')
+    if sentence_embeddings is None:
+        scores = [0.5] * len(ctx.responses)  # Neutral score on error
+    else:
+        scores = LogicEvaluator.check_self_consistency_batch(ctx.responses, sentence_embeddings=sentence_embeddings)
+    return [score if response else 0.0 for response, score in zip(ctx.responses, scores)]
+
+def _nlp_metric(name):
+    return lambda ctx: [metrics[name] for metrics in ctx.stage('tokens')]
+
+class MetricRegistry:
+    """
+    Registry of the metrics the evaluation endpoints can compute
+
+    Each metric declares its cost and the analysis stages it depends on:
+    shared tokens, word tokens, question or sentence embeddings, or a
+    parsed math expression. Only the stages needed by the requested metrics
+    run, and a question-type router skips metrics that don't apply, such as
+    math validity on greetings.
+    """
+    STAGES = {
+        'tokens': _tokens_stage,
+        'words': _words_stage,
+        'embeddings': _embeddings_stage,
+        'sentence_embeddings': _sentence_embeddings_stage,
+        'math': _math_stage
+    }
+
+    _metrics = {}
+
+    @staticmethod
+    def register(metric):
+        """Register a Metric, replacing any metric with the same name"""
+        for stage in metric.requires:
+            if stage not in MetricRegistry.STAGES:
+                raise ValueError(f"Metric '{metric.name}' requires unknown stage '{stage}'")
+        MetricRegistry._metrics[metric.name] = metric
+        return metric
+
+    @staticmethod
+    def available():
+        """Return the registered metrics, cheapest first"""
+        return sorted(MetricRegistry._metrics.values(), key=lambda m: (m.cost, m.name))
+
+    @staticmethod
+    def resolve(names=None):
+        """
+        Validate requested metric names
+
+        Args:
+            names: List of metric names, a comma-separated string, or None
+                for DEFAULT_METRICS
+
+        Returns:
+            List of metric names in request order without duplicates
+
+        Raises:
+            ValueError: If a name is not registered
+        """
+        if names is None:
+            return list(DEFAULT_METRICS)
+        if isinstance(names, str):
+            names = [name.strip() for name in names.split(',') if name.strip()]
+        if not isinstance(names, (list, tuple)):
+            raise ValueError("metrics must be a list of metric names")
+        unknown = [name for name in names if name not in MetricRegistry._metrics]
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(unknown)}. "
+                             f"Available: {', '.join(m.name for m in MetricRegistry.available())}")
+        return list(dict.fromkeys(names))
+
+    @staticmethod
+    def with_core(names=None):
+        """Resolve names and add the metrics a saved evaluation must include"""
+        return MetricRegistry.resolve(list(CORE_METRICS) + MetricRegistry.resolve(names))
+
+    @staticmethod
+    def classify_question(question):
+        """Classify a question as 'greeting', 'math' or 'general'"""
+        text = str(question or '').strip()
+        if _MATH_RE.search(text):
+            return 'math'
+        if len(text.split()) <= 3 and _GREETING_RE.match(text):
+            return 'greeting'
+        return 'general'
+
+    @staticmethod
+    def evaluate(question, responses, metrics=None, executor=None):
+        """
+        Compute the requested metrics for every response to a question
+
+        Args:
+            question: The user's question
+            responses: List of response texts
+            metrics: Metric names (see resolve); defaults to DEFAULT_METRICS
+            executor: Optional EvaluationExecutor for the tokens stage
+
+        Returns:
+            List of {metric: value} dictionaries aligned with responses.
+            Metrics that don't apply to the question's type are left out.
+        """
+        names = MetricRegistry.resolve(metrics)
+        selected = [MetricRegistry._metrics[name] for name in names]
+
+        # Only classify the question when some requested metric is restricted
+        if any(metric.question_types for metric in selected):
+            question_type = MetricRegistry.classify_question(question)
+            skipped = [metric.name for metric in selected if not metric.applies_to(question_type)]
+            if skipped:
+                print(f"DEBUG [Metrics]: Skipping {', '.join(skipped)} for {question_type} question")
+            selected = [metric for metric in selected if metric.applies_to(question_type)]
+
+        ctx = MetricContext(question, responses, executor, [metric.name for metric in selected])
+        values = {}
+        for metric in sorted(selected, key=lambda m: m.cost):
+            values[metric.name] = metric.compute(ctx)
+
+        # Keep the caller's metric order in each result
+        ordered = [name for name in names if name in values]
+        return [{name: values[name][i] for name in ordered} for i in range(len(ctx.responses))]
+
+for _name, _description in (
+    ('coherence', "Sentence structure and relevance to the question"),
+    ('token_overlap', "Share of question stems found in the response"),
+    ('length_ratio', "Response length relative to the question"),
+    ('overall_score', "Weighted combination of the NLP metrics")
+):
+    MetricRegistry.register(Metric(_name, _nlp_metric(_name), cost=1, requires=('tokens',),
+                                   description=_description))
+
+MetricRegistry.register(Metric('logical_consistency', _logical_consistency, cost=2,
+                               requires=('sentence_embeddings',) if LOGIC_CONSISTENCY_MODE == 'embedding' else ('words',),
+                               description="Penalty for contradictory word pairs"))
+MetricRegistry.register(Metric('math_validity', lambda ctx: ctx.stage('math'), cost=5,
+                               requires=('math',), question_types=('math',),
+                               description="Whether the response's arithmetic matches the question's"))
+MetricRegistry.register(Metric('self_consistency', _self_consistency, cost=10,
+                               requires=('sentence_embeddings',),
+                               description="Penalty for similar sentences with opposite polarity"))
+MetricRegistry.register(Metric('semantic_similarity', lambda ctx: ctx.stage('embeddings'), cost=10,
+                               requires=('embeddings',),
+                               description="Embedding similarity between question and response"))
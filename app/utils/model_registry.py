@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+from app.utils.batch_encoder import BatchEncoder, EMBEDDING_BATCH_SIZE
+from app.utils.embedding_cache import encode_texts
+
+# Sentence-transformer model used for embeddings unless a caller asks for another
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+
+# Run the model's linear layers with dynamic int8 quantization (CPU only)
+EMBEDDING_QUANTIZE = os.getenv('EMBEDDING_QUANTIZE', 'false').lower() == 'true'
+
+def _quantize(model):
+    # Replace nn.Linear layers with dynamically quantized int8 versions
+    import torch
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def _rss_bytes():
+    # Resident memory of this process, where /proc is available
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+class ModelRegistry:
+    """
+    Process-wide registry of sentence-transformer models
+
+    Each model is loaded lazily, exactly once, and the same instance is
+    handed to every caller (RAGEvaluator, RAGService, LogicEvaluator).
+    Load time and memory are recorded per model.
+
+    With quantization on, models are quantized to int8 once after loading
+    and registered under "<name>:int8", so their embeddings are cached
+    apart from the float32 ones.
+
+    Encoding goes through one BatchEncoder per model, which merges
+    concurrent requests into shared batches.
+    """
+    _models = {}
+    _encoders = {}
+    _stats = {}
+    _locks = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get(name=None, quantize=None):
+        """
+        Return the loaded model, loading it on first use
+
+        Args:
+            name: Model name (defaults to EMBEDDING_MODEL)
+            quantize: Use the int8 quantized model (defaults to EMBEDDING_QUANTIZE)
+        """
+        name = name or EMBEDDING_MODEL
+        model_id = ModelRegistry.model_id(name, quantize)
+        model = ModelRegistry._models.get(model_id)
+        if model is not None:
+            return model
+
+        with ModelRegistry._lock:
+            lock = ModelRegistry._locks.setdefault(model_id, threading.Lock())
+        with lock:
+            if model_id not in ModelRegistry._models:
+                from sentence_transformers import SentenceTransformer
+
+                rss_before = _rss_bytes()
+                start = time.perf_counter()
+                if model_id == name:
+                    model = SentenceTransformer(name)
+                else:
+                    # Quantized kernels only run on CPU
+                    model = _quantize(SentenceTransformer(name, device='cpu'))
+                load_seconds = time.perf_counter() - start
+                rss_after = _rss_bytes()
+
+                parameters = list(model.parameters()) if hasattr(model, 'parameters') else []
+                ModelRegistry._stats[model_id] = {
+                    'load_seconds': round(load_seconds, 3),
+                    'parameters': sum(p.numel() for p in parameters),
+                    'parameter_bytes': sum(p.numel() * p.element_size() for p in parameters),
+                    'rss_delta_bytes': rss_after - rss_before if rss_before is not None and rss_after is not None else None
+                }
+                print(f"Loaded model {model_id} in {load_seconds:.2f}s")
+                ModelRegistry._models[model_id] = model
+        return ModelRegistry._models[model_id]
+
+    @staticmethod
+    def model_id(name=None, quantize=None):
+        """Identifier of the model variant, as used in embedding cache keys"""
+        if quantize is None:
+            quantize = EMBEDDING_QUANTIZE
+        return f"{name or EMBEDDING_MODEL}:int8" if quantize else name or EMBEDDING_MODEL
+
+    @staticmethod
+    def encoder(name=None, quantize=None):
+        """
+        Return the micro-batching encoder for a model
+
+        Falls back to the model itself when EMBEDDING_BATCH_SIZE is 0.
+        """
+        model = ModelRegistry.get(name, quantize)
+        if EMBEDDING_BATCH_SIZE <= 0:
+            return model
+        model_id = ModelRegistry.model_id(name, quantize)
+        if model_id not in ModelRegistry._encoders:
+            with ModelRegistry._lock:
+                if model_id not in ModelRegistry._encoders:
+                    ModelRegistry._encoders[model_id] = BatchEncoder(model)
+        return ModelRegistry._encoders[model_id]
+
+    @staticmethod
+    def encode(texts, name=None, quantize=None):
+        """
+        Encode texts with a registered model through the embedding cache
+
+        Returns:
+            Float32 array of L2-normalized embeddings, one row per text
+        """
+        return encode_texts(ModelRegistry.encoder(name, quantize), texts, ModelRegistry.model_id(name, quantize))
+
+    @staticmethod
+    def stats():
+        """Return load time, memory and batching counters for every loaded model"""
+        stats = {}
+        for model_id, model_stats in ModelRegistry._stats.items():
+            stats[model_id] = dict(model_stats)
+            encoder = ModelRegistry._encoders.get(model_id)
+            stats[model_id]['batching'] = encoder.stats() if encoder else None
+        return stats
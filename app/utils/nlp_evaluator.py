@@ -1,208 +1,474 @@
 # NLP Evaluator - Fixed version
-import nltk
 from nltk.translate.bleu_score import sentence_bleu
-from nltk.tokenize import word_tokenize, sent_tokenize
 import numpy as np
 import string
 import re
 import random
-from nltk.stem import PorterStemmer
-
-# Download NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
-try:
-    nltk.data.find('stopwords')
-except LookupError:
-    nltk.download('stopwords')
+import functools
+import os
+from app.utils.token_cache import TokenCache
+from app.utils.tokenizers import Tokenizer
+from app.utils.result_cache import result_cache
+
+# Texts longer than this many characters are analyzed in streaming mode
+STREAMING_THRESHOLD = int(os.getenv('NLP_STREAMING_THRESHOLD', '20000'))
+
+class AnalyzedText:
+    """
+    A text analyzed once and shared by every NLP metric
+
+    Holds the lowercased text, tokens, stems, token sets and sentences so that
+    scoring several metrics (or several responses against the same question)
+    never tokenizes or stems the same text twice.
+    """
+    def __init__(self, text):
+        self.text = str(text) if text else ''
+        self.lower = self.text.lower()
+        self.word_count = len(self.text.split())
+
+        if self.text:
+            self.tokens = Tokenizer.clean_word_tokenize(re.sub(r'[^\w\s]', '', self.lower))
+        else:
+            self.tokens = []
+        self.stems = TokenCache.stem_tokens(self.tokens)
+        self.stem_set = set(self.stems)
+        self.stem_count = len(self.stems)
+
+        # Sentence analysis is only needed for responses, so build it on demand
+        self._sentences = None
+        self._sentence_word_counts = None
+        self._sentence_stats = None
+
+    def __bool__(self):
+        return bool(self.text)
+
+    @property
+    def sentences(self):
+        if self._sentences is None:
+            self._sentences = Tokenizer.sent_tokenize(self.text) if self.text else []
+        return self._sentences
+
+    @property
+    def sentence_word_counts(self):
+        if self._sentence_word_counts is None:
+            self._sentence_word_counts = [len(Tokenizer.word_tokenize(s)) for s in self.sentences]
+        return self._sentence_word_counts
+
+    @property
+    def sentence_stats(self):
+        """
+        Aggregate sentence statistics used by the coherence metric
+
+        Returns (sentence count, short sentence count, sum of word counts,
+        sum of squared word counts). Word counts are integers, so these sums
+        are exact and the length standard deviation can be derived from them.
+        """
+        if self._sentence_stats is None:
+            counts = self.sentence_word_counts
+            self._sentence_stats = (
+                len(counts),
+                sum(1 for c in counts if c < 3),
+                sum(counts),
+                sum(c * c for c in counts)
+            )
+        return self._sentence_stats
+
+class StreamingAnalyzedText(AnalyzedText):
+    """
+    AnalyzedText for very long texts, built in one pass over sentences
+
+    Sentences come from a generator and only running aggregates are kept:
+    sentence count, short sentence count, the exact integer sums behind the
+    sentence-length standard deviation, the token count and the stem set.
+    Peak memory is bounded by the vocabulary rather than the text length,
+    and the aggregates are identical to the ones AnalyzedText derives from
+    its lists, so scores match the batch path exactly.
+
+    Token and sentence lists are not stored; accessing them re-tokenizes.
+    """
+    def __init__(self, text):
+        self.text = str(text) if text else ''
+        self.word_count = sum(1 for _ in re.finditer(r'\S+', self.text))
+
+        stem_set = set()
+        stem_count = 0
+        n_sent = n_short = total = total_sq = 0
+        for sentence in Tokenizer.iter_sentences(self.text):
+            count = len(Tokenizer.word_tokenize(sentence))
+            n_sent += 1
+            n_short += count < 3
+            total += count
+            total_sq += count * count
+
+            # Punctuation-stripped tokens never span sentences, so stemming
+            # sentence by sentence yields the same stems as the whole text
+            tokens = Tokenizer.clean_word_tokenize(re.sub(r'[^\w\s]', '', sentence.lower()))
+            for stem in TokenCache.stem_tokens(tokens):
+                stem_set.add(stem)
+                stem_count += 1
+
+        self.stem_set = stem_set
+        self.stem_count = stem_count
+        self._sentence_stats = (n_sent, n_short, total, total_sq)
+        self._sentences = None
+        self._sentence_word_counts = None
+
+    @property
+    def lower(self):
+        return self.text.lower()
+
+    @property
+    def tokens(self):
+        return AnalyzedText(self.text).tokens
+
+    @property
+    def stems(self):
+        return TokenCache.stem_tokens(self.tokens)
+
+    @property
+    def sentences(self):
+        return Tokenizer.sent_tokenize(self.text) if self.text else []
+
+    @property
+    def sentence_word_counts(self):
+        return [len(Tokenizer.word_tokenize(s)) for s in Tokenizer.iter_sentences(self.text)]
+
+def _round_scores(scores, numpy_rounded=False):
+    # Round to 2 places with Python's round(), or numpy's where numpy_rounded
+    python = np.array([round(float(x), 2) for x in scores])
+    return np.where(numpy_rounded, np.round(scores, 2), python)
 
 class NLPEvaluator:
+    # Bump VERSION whenever scoring changes so cached results are not reused
+    VERSION = '2'
+    WEIGHTS = {'coherence': 0.4, 'token_overlap': 0.4, 'length_ratio': 0.2}
+    METRICS = ('coherence', 'token_overlap', 'length_ratio', 'overall_score')
+
+    @staticmethod
+    def analyze(text, streaming=None):
+        """
+        Return an AnalyzedText for text, reusing it if already analyzed
+
+        Args:
+            text: Raw text or an AnalyzedText
+            streaming: Force (True) or disable (False) streaming analysis;
+                by default texts longer than NLP_STREAMING_THRESHOLD stream
+        """
+        if isinstance(text, AnalyzedText):
+            return text
+        if streaming is None:
+            streaming = text is not None and len(str(text)) > STREAMING_THRESHOLD
+        return StreamingAnalyzedText(text) if streaming else AnalyzedText(text)
+
     @staticmethod
     def preprocess_text(text, use_stemming=True):
         # Process text by removing punctuation, lowercasing, and stemming
         if not text:
             print("DEBUG [Preprocess]: Empty text")
             return []
-            
-        text = str(text).lower()
-        text = re.sub(r'[^\w\s]', '', text)
-        tokens = word_tokenize(text)
-        
-        if use_stemming:
-            stemmer = PorterStemmer()
-            tokens = [stemmer.stem(token) for token in tokens]
-            
-        return tokens
-        
+
+        analysis = NLPEvaluator.analyze(text)
+        return list(analysis.stems if use_stemming else analysis.tokens)
+
+    @staticmethod
+    def _token_overlap_scores(references, candidates):
+        # Vectorized token overlap for aligned lists of analyzed texts
+        ref_sizes = np.array([len(r.stem_set) for r in references], dtype=float)
+        cand_sizes = np.array([len(c.stem_set) for c in candidates], dtype=float)
+        common = np.array([len(r.stem_set.intersection(c.stem_set))
+                           for r, c in zip(references, candidates)], dtype=float)
+
+        # Check for greeting patterns
+        greeting_tokens = {'hi', 'hello', 'hey', 'greet'}
+        is_greeting = np.array([len(r.stem_set) <= 2 and not r.stem_set.isdisjoint(['hi', 'hello', 'hey'])
+                                for r in references])
+        has_greeting = np.array([not c.stem_set.isdisjoint(greeting_tokens) for c in candidates])
+
+        # Standard calculation, with special handling for greetings
+        overlap = common / np.maximum(ref_sizes, 1)
+        overlap = np.where(is_greeting & has_greeting, np.maximum(0.8, overlap), overlap)
+
+        return np.where((ref_sizes == 0) | (cand_sizes == 0), 0.0, overlap)
+
     @staticmethod
     def calculate_token_overlap(reference, candidate):
         # Calculate token overlap between reference and candidate
-        ref_tokens = set(NLPEvaluator.preprocess_text(reference))
-        cand_tokens = set(NLPEvaluator.preprocess_text(candidate))
-        
-        if not ref_tokens or not cand_tokens:
-            return 0.0
-            
-        # Check for greeting patterns
-        is_greeting = len(ref_tokens) <= 2 and any(t in ['hi', 'hello', 'hey'] for t in ref_tokens)
-        
-        common = ref_tokens.intersection(cand_tokens)
-        
-        # Special handling for greetings
-        if is_greeting:
-            greeting_tokens = {'hi', 'hello', 'hey', 'greet'}
-            has_greeting = any(t in greeting_tokens for t in cand_tokens)
-            if has_greeting:
-                return max(0.8, len(common) / len(ref_tokens))
-                
-        # Standard calculation
-        return len(common) / max(len(ref_tokens), 1)
-    
+        return float(NLPEvaluator._token_overlap_scores(
+            [NLPEvaluator.analyze(reference)], [NLPEvaluator.analyze(candidate)])[0])
+
+    @staticmethod
+    def _length_ratio_scores(references, candidates):
+        # Vectorized length ratio for aligned lists of analyzed texts
+        ref_len = np.array([r.stem_count for r in references], dtype=float)
+        cand_len = np.array([c.stem_count for c in candidates], dtype=float)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Short prompt handling: greeting-type responses of 3-30 tokens
+            # are ideal, longer ones are penalized as verbose, shorter ones
+            # as too short
+            short_score = np.where(cand_len > 30, 30 / cand_len,
+                                   np.where(cand_len >= 3, 1.0, cand_len / 5))
+
+            # Normal handling: invert the ratio if the response is too long
+            ratio = cand_len / ref_len
+            normal_score = np.where(ratio > 1, 1.0 / ratio, ratio)
+
+        scores = np.where(ref_len <= 2, short_score, normal_score)
+        return np.where(ref_len == 0, 0.0, scores)
+
     @staticmethod
     def calculate_length_ratio(reference, candidate):
         # Calculate appropriate length ratio
-        ref_tokens = NLPEvaluator.preprocess_text(reference)
-        cand_tokens = NLPEvaluator.preprocess_text(candidate)
-        
-        ref_len = len(ref_tokens)
-        cand_len = len(cand_tokens)
-        
-        if ref_len == 0:
-            return 0.0
-            
-        # Short prompt handling
-        is_short = ref_len <= 2
-        ratio = cand_len / ref_len
-        
-        if is_short:
-            # Greeting-type responses
-            if 3 <= cand_len <= 30:
-                return 1.0
-            elif cand_len > 30:
-                return 30 / cand_len  # Penalize verbose
-            else:
-                return cand_len / 5  # Penalize too short
-        else:
-            # Normal handling
-            if ratio > 1:
-                return 1.0 / ratio  # Invert if too long
-            return ratio
-            
+        return float(NLPEvaluator._length_ratio_scores(
+            [NLPEvaluator.analyze(reference)], [NLPEvaluator.analyze(candidate)])[0])
+
+    @staticmethod
+    def _sentence_length_stats(texts):
+        # Sentence count, short sentence count and the standard deviation of
+        # sentence lengths of each analyzed text
+        stats = np.array([t.sentence_stats if t else (0, 0, 0, 0) for t in texts],
+                         dtype=float).reshape(-1, 4)
+        n_sent, n_short, total, total_sq = stats.T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            length_std = np.sqrt(np.maximum(n_sent * total_sq - total * total, 0) / (n_sent * n_sent))
+        return n_sent, n_short, length_std
+
+    @staticmethod
+    def _coherence_scores(texts, questions):
+        # Vectorized coherence for aligned lists of analyzed texts; a question
+        # entry may be None when coherence is judged without a question
+        n_sent, n_short, length_std = NLPEvaluator._sentence_length_stats(texts)
+
+        has_question = np.array([bool(q) for q in questions])
+        is_short_prompt = np.array([bool(q) and q.word_count <= 2 for q in questions])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            short_ratio = n_short / np.maximum(n_sent, 1)
+
+            # Length variation
+            length_var = np.where(n_sent > 1, np.minimum(1.0, 5.0 / np.maximum(length_std, 1)), 0.5)
+
+            # Sentence count score
+            short_sent_score = np.where(n_sent <= 3, 1.0, np.minimum(1.0, 5.0 / n_sent))
+            normal_sent_score = np.where(n_sent < 5, np.minimum(1.0, n_sent / 5.0),
+                                         np.minimum(1.0, 10.0 / n_sent))
+            sent_score = np.where(is_short_prompt, short_sent_score, normal_sent_score)
+
+        # Content relevance
+        content_score = np.full(len(texts), 0.5)
+        greeting_tokens = {'hi', 'hello', 'hey', 'greet', 'welcom'}
+        for i, (text, question) in enumerate(zip(texts, questions)):
+            if not question or not question.stem_set or not text.stem_set:
+                continue
+            if is_short_prompt[i] and not text.stem_set.isdisjoint(greeting_tokens):
+                # Greeting responses to greetings
+                content_score[i] = 0.9
+                continue
+            common = len(question.stem_set.intersection(text.stem_set))
+            union = len(question.stem_set.union(text.stem_set))
+            content_score[i] = common / max(union, 1)
+            if is_short_prompt[i]:
+                content_score[i] = max(0.6, content_score[i])
+
+        # Calculate final coherence
+        short_prompt_score = np.minimum(1.0, (0.2 * (1 - short_ratio) +
+                                              0.2 * length_var +
+                                              0.2 * sent_score +
+                                              0.4 * content_score) * 1.2)  # 20% boost
+        question_score = (0.3 * (1 - short_ratio) +
+                          0.3 * length_var +
+                          0.2 * sent_score +
+                          0.2 * content_score)
+        no_question_score = (0.4 * (1 - short_ratio) +
+                             0.4 * length_var +
+                             0.2 * sent_score)
+
+        score = np.where(is_short_prompt, short_prompt_score,
+                         np.where(has_question, question_score, no_question_score))
+        score = np.minimum(1.0, np.maximum(0.0, score))
+
+        # Empty texts (or texts without sentences) are not coherent
+        return np.where(n_sent == 0, 0.0, score)
+
     @staticmethod
     def evaluate_coherence(text, question=None):
         # Evaluate text coherence
         if not text:
             return 0.0
-            
-        sentences = sent_tokenize(text)
-        if not sentences:
-            return 0.0
-            
-        # Short prompt detection
-        is_short_prompt = question and len(question.split()) <= 2
-        
-        # Calculate metrics
-        word_counts = [len(word_tokenize(s)) for s in sentences]
-        short_ratio = sum(1 for c in word_counts if c < 3) / max(len(sentences), 1)
-        
-        # Length variation
-        if len(word_counts) > 1:
-            length_std = np.std(word_counts)
-            length_var = min(1.0, 5.0 / max(length_std, 1))
-        else:
-            length_var = 0.5
-            
-        # Sentence count score
-        if is_short_prompt:
-            sent_score = 1.0 if len(sentences) <= 3 else min(1.0, 5.0 / len(sentences))
-        else:
-            sent_score = min(1.0, len(sentences) / 5.0) if len(sentences) < 5 else min(1.0, 10.0 / len(sentences))
-        
-        # Content relevance
-        content_score = 0.5
-        if question:
-            q_tokens = set(NLPEvaluator.preprocess_text(question))
-            r_tokens = set(NLPEvaluator.preprocess_text(text))
-            
-            if q_tokens and r_tokens:
-                if is_short_prompt:
-                    # Check for greeting responses
-                    greeting_tokens = {'hi', 'hello', 'hey', 'greet', 'welcom'}
-                    if any(t in greeting_tokens for t in r_tokens):
-                        content_score = 0.9
-                    else:
-                        common = len(q_tokens.intersection(r_tokens))
-                        union = len(q_tokens.union(r_tokens))
-                        content_score = max(0.6, common / max(union, 1))
-                else:
-                    common = len(q_tokens.intersection(r_tokens))
-                    union = len(q_tokens.union(r_tokens))
-                    content_score = common / max(union, 1)
-        
-        # Calculate final coherence
+
+        text = NLPEvaluator.analyze(text)
         if question:
-            if is_short_prompt:
-                score = (0.2 * (1 - short_ratio) +
-                         0.2 * length_var +
-                         0.2 * sent_score +
-                         0.4 * content_score)
-                score = min(1.0, score * 1.2)  # 20% boost
-            else:
-                score = (0.3 * (1 - short_ratio) +
-                         0.3 * length_var +
-                         0.2 * sent_score +
-                         0.2 * content_score)
-        else:
-            score = (0.4 * (1 - short_ratio) +
-                     0.4 * length_var +
-                     0.2 * sent_score)
-        
-        return min(1.0, max(0.0, score))
-        
+            question = NLPEvaluator.analyze(question)
+        return float(NLPEvaluator._coherence_scores([text], [question])[0])
+
+    @staticmethod
+    def _score_batch(questions, responses, metrics=None):
+        # Score aligned lists of analyzed questions and responses together,
+        # computing only the requested metrics (and what overall_score needs)
+        metrics = NLPEvaluator.METRICS if metrics is None else tuple(metrics)
+        empty = {'overall_score': 0, 'coherence': 0, 'token_overlap': 0, 'length_ratio': 0}
+        valid = [i for i, (q, r) in enumerate(zip(questions, responses)) if q and r]
+        results = [{name: empty[name] for name in metrics} for _ in responses]
+        if not valid:
+            return results
+        needed = set(NLPEvaluator.METRICS) if 'overall_score' in metrics else set(metrics)
+
+        questions = [questions[i] for i in valid]
+        responses = [responses[i] for i in valid]
+
+        # Calculate individual metrics, rounded for output. The per-pair code
+        # this replaced got an np.float64 coherence (and overall score) from
+        # np.std when sentence lengths varied with a deviation above 5, and
+        # round() on those rounds like numpy, which differs from Python on
+        # ties such as 0.405; both are reproduced so scores stay identical
+        scores = {}
+        if 'coherence' in needed:
+            n_sent, _, length_std = NLPEvaluator._sentence_length_stats(responses)
+            numpy_rounded = (n_sent > 1) & (length_std > 5)
+            scores['coherence'] = _round_scores(NLPEvaluator._coherence_scores(responses, questions), numpy_rounded)
+        if 'token_overlap' in needed:
+            scores['token_overlap'] = _round_scores(NLPEvaluator._token_overlap_scores(questions, responses))
+        if 'length_ratio' in needed:
+            scores['length_ratio'] = _round_scores(NLPEvaluator._length_ratio_scores(questions, responses))
+
+        if 'overall_score' in needed:
+            # Calculate overall score with appropriate weights
+            weights = NLPEvaluator.WEIGHTS
+            score = (weights['coherence'] * scores['coherence'] +
+                     weights['token_overlap'] * scores['token_overlap'] +
+                     weights['length_ratio'] * scores['length_ratio'])
+
+            # Boost appropriate greeting responses to short prompts
+            is_short_prompt = np.array([q.word_count <= 2 for q in questions])
+            boost = is_short_prompt & (score < 0.5) & (scores['coherence'] > 0.6)
+            score = np.where(boost, np.minimum(1.0, score * 1.5), score)
+            scores['overall_score'] = _round_scores(score, numpy_rounded)
+
+        for j, i in enumerate(valid):
+            results[i] = {name: float(scores[name][j]) for name in metrics}
+        return results
+
+    @staticmethod
+    def _cache_key(question, response):
+        # Content address of a result: both texts plus everything that affects scoring
+        def text_of(value):
+            if isinstance(value, AnalyzedText):
+                return value.text
+            return str(value) if value else ''
+        return result_cache.make_key(NLPEvaluator.VERSION, NLPEvaluator.WEIGHTS, Tokenizer.backend,
+                                     text_of(question), text_of(response))
+
     @staticmethod
     def evaluate_text(question, response):
         # Main evaluation function
         if not question or not response:
             return {'overall_score': 0, 'coherence': 0, 'token_overlap': 0, 'length_ratio': 0}
-            
+
         # Generate ID for tracing
         eval_id = random.randint(1000, 9999)
-        print(f"[Eval {eval_id}] Evaluating response for: '{question[:30]}...' ({len(question)} chars)")
-        
-        # Calculate individual metrics
-        coherence = NLPEvaluator.evaluate_coherence(response, question)
-        token_overlap = NLPEvaluator.calculate_token_overlap(question, response)
-        length_ratio = NLPEvaluator.calculate_length_ratio(question, response)
-        
-        # Format for output
-        metrics = {
-            'coherence': round(coherence, 2),
-            'token_overlap': round(token_overlap, 2),
-            'length_ratio': round(length_ratio, 2)
-        }
-        
-        # Determine if this is a short prompt
-        is_short_prompt = len(question.strip().split()) <= 2
-        
-        # Calculate overall score with appropriate weights
-        if is_short_prompt:
-            # For short prompts like greetings
-            score = (0.4 * metrics['coherence'] +
-                     0.4 * metrics['token_overlap'] +
-                     0.2 * metrics['length_ratio'])
-                     
-            # Boost appropriate greeting responses
-            if score < 0.5 and metrics['coherence'] > 0.6:
-                score = min(1.0, score * 1.5)
-        else:
-            # Standard weighting
-            score = (0.4 * metrics['coherence'] +
-                     0.4 * metrics['token_overlap'] +
-                     0.2 * metrics['length_ratio'])
-        
-        metrics['overall_score'] = round(score, 2)
+
+        # Reuse the result if this exact pair was scored before
+        cache_key = NLPEvaluator._cache_key(question, response)
+        metrics = result_cache.get(cache_key)
+        if metrics is not None:
+            print(f"[Eval {eval_id}] Cache hit, score: {metrics['overall_score']}")
+            return metrics
+
+        # Analyze each text once; callers scoring many responses can pass
+        # AnalyzedText instances to share the question analysis
+        question = NLPEvaluator.analyze(question)
+        response = NLPEvaluator.analyze(response)
+
+        print(f"[Eval {eval_id}] Evaluating response for: '{question.text[:30]}...' ({len(question.text)} chars)")
+
+        metrics = NLPEvaluator._score_batch([question], [response])[0]
+        result_cache.put(cache_key, metrics)
         print(f"[Eval {eval_id}] Score: {metrics['overall_score']}")
-        
+
         return metrics
+
+    @staticmethod
+    def score_pairs(questions, responses, metrics=None):
+        """
+        Analyze and score aligned questions and responses, bypassing the result cache
+
+        Each distinct text is analyzed once. This is the unit of work
+        evaluation executors run in their workers. metrics limits scoring
+        to some of METRICS (default: all).
+        """
+        analyzed = {}
+        def analyze(text):
+            if isinstance(text, AnalyzedText):
+                return text
+            key = str(text) if text else ''
+            if key not in analyzed:
+                analyzed[key] = NLPEvaluator.analyze(key)
+            return analyzed[key]
+
+        return NLPEvaluator._score_batch([analyze(q) for q in questions],
+                                         [analyze(r) for r in responses], metrics)
+
+    @staticmethod
+    def evaluate_batch(question, responses, executor=None, metrics=None):
+        """
+        Evaluate many responses in one vectorized pass
+
+        Args:
+            question: A question shared by every response, or a list of
+                questions aligned with responses
+            responses: List of response texts (or AnalyzedText instances)
+            executor: Optional EvaluationExecutor to spread uncached pairs
+                across workers; scored inline when omitted
+            metrics: Names from METRICS to compute (default: all). Only
+                complete results are stored in the result cache
+
+        Returns:
+            List of metric dictionaries in the same order as responses, each
+            identical to (or the requested part of) what evaluate_text
+            returns for that pair
+        """
+        responses = list(responses)
+        if isinstance(question, (list, tuple)):
+            if len(question) != len(responses):
+                raise ValueError("Number of questions and responses must match")
+            questions = list(question)
+        else:
+            questions = [question] * len(responses)
+
+        complete = metrics is None or set(NLPEvaluator.METRICS) <= set(metrics)
+        metrics = NLPEvaluator.METRICS if complete else tuple(dict.fromkeys(metrics))
+
+        # Check the result cache before analyzing anything
+        keys = [NLPEvaluator._cache_key(q, r) for q, r in zip(questions, responses)]
+        results = [result_cache.get(key) for key in keys]
+        if not complete:
+            results = [{name: result[name] for name in metrics} if result is not None else None
+                       for result in results]
+        pending = {}
+        for i, result in enumerate(results):
+            if result is None:
+                pending.setdefault(keys[i], i)
+
+        batch_id = random.randint(1000, 9999)
+        print(f"[Batch {batch_id}] Evaluating {len(responses)} responses "
+              f"({len(responses) - len(pending)} cached)")
+        if not pending:
+            return results
+
+        indices = list(pending.values())
+        pending_questions = [questions[i] for i in indices]
+        pending_responses = [responses[i] for i in indices]
+        score = NLPEvaluator.score_pairs if complete else functools.partial(NLPEvaluator.score_pairs,
+                                                                              metrics=metrics)
+        if executor is None:
+            scored = score(pending_questions, pending_responses)
+        else:
+            scored = executor.run(score, pending_questions, pending_responses)
+
+        computed = {}
+        for i, result in zip(indices, scored):
+            if complete:
+                result_cache.put(keys[i], result)
+            computed[keys[i]] = result
+        return [result if result is not None else dict(computed[key])
+                for key, result in zip(keys, results)]
@@ -0,0 +1,95 @@
+import os
+import threading
+import nltk
+
+# Local directory NLTK data is loaded from; nothing is downloaded at runtime
+NLTK_DATA_DIR = os.getenv(
+    'NLTK_DATA_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'nltk_data')
+)
+
+# Resource name -> path inside the NLTK data directory
+RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'stopwords': 'corpora/stopwords'
+}
+
+class NLTKResources:
+    """
+    Lazy, offline-only access to the NLTK data the evaluators need
+
+    Resources are looked up in NLTK_DATA_DIR (ahead of NLTK's default search
+    path) the first time they are needed, never at import time and never
+    over the network. Run warmup_nltk.py --download once per deployment to
+    populate the directory.
+    """
+    _configured = False
+    _available = set()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def configure():
+        """Put NLTK_DATA_DIR first on NLTK's data search path"""
+        if not NLTKResources._configured:
+            with NLTKResources._lock:
+                if not NLTKResources._configured:
+                    if NLTK_DATA_DIR not in nltk.data.path:
+                        nltk.data.path.insert(0, NLTK_DATA_DIR)
+                    NLTKResources._configured = True
+
+    @staticmethod
+    def require(name):
+        """
+        Make sure a resource is available locally, checking only once
+
+        Raises:
+            LookupError: If the resource is missing, with the command to fix it
+        """
+        if name in NLTKResources._available:
+            return
+        NLTKResources.configure()
+        try:
+            nltk.data.find(RESOURCES[name])
+        except LookupError:
+            raise LookupError(
+                f"NLTK resource '{name}' not found in {NLTK_DATA_DIR}. "
+                f"Run 'python warmup_nltk.py --download' to install it."
+            ) from None
+        NLTKResources._available.add(name)
+
+    @staticmethod
+    def warmup(download=False):
+        """
+        Verify and preload every resource, optionally downloading missing ones
+
+        Args:
+            download: Download missing resources into NLTK_DATA_DIR
+
+        Returns:
+            Dictionary of resource name -> True if available and loaded
+        """
+        NLTKResources.configure()
+        status = {}
+        for name in RESOURCES:
+            try:
+                NLTKResources.require(name)
+            except LookupError:
+                if not download:
+                    status[name] = False
+                    continue
+                os.makedirs(NLTK_DATA_DIR, exist_ok=True)
+                nltk.download(name, download_dir=NLTK_DATA_DIR, quiet=True)
+                try:
+                    NLTKResources.require(name)
+                except LookupError:
+                    status[name] = False
+                    continue
+            status[name] = True
+
+        # Load the data itself so the first request doesn't pay for it
+        if status.get('punkt'):
+            nltk.sent_tokenize("Warm up the sentence tokenizer. It is loaded once.")
+        if status.get('stopwords'):
+            from app.utils.token_cache import TokenCache
+            TokenCache.stopwords()
+        return status
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from app.utils.lru_cache import LRUCache
+
+# Number of evaluation results kept in memory
+RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', '10000'))
+
+# Optional SQLite file for a persistent tier that survives restarts
+RESULT_CACHE_PATH = os.getenv('RESULT_CACHE_PATH')
+
+class ResultCache:
+    """
+    Content-addressed cache of evaluation results
+
+    Results are keyed by a hash of everything that determines them (question,
+    response, evaluator version, weights and tokenizer backend). Lookups go
+    to an in-memory LRU first, then to an optional SQLite tier; disk hits are
+    promoted to memory.
+    """
+    def __init__(self, maxsize=RESULT_CACHE_SIZE, path=RESULT_CACHE_PATH):
+        self.memory = LRUCache(maxsize)
+        self.path = path
+        self._connection = None
+        self._lock = threading.Lock()
+        self.disk_hits = 0
+        self.disk_misses = 0
+
+    @staticmethod
+    def make_key(*parts):
+        """Hash the JSON-serializable parts into a stable cache key"""
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _db(self):
+        # Open the SQLite tier on first use; callers hold self._lock
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+            self._connection.commit()
+        return self._connection
+
+    def get(self, key):
+        """Return a copy of the cached result for key, or None"""
+        result = self.memory.get(key)
+        if result is not None:
+            return dict(result)
+        if not self.path:
+            return None
+
+        try:
+            with self._lock:
+                row = self._db().execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+                if row is None:
+                    self.disk_misses += 1
+                    return None
+                self.disk_hits += 1
+        except sqlite3.Error as e:
+            print(f"Error reading result cache: {e}")
+            return None
+
+        result = json.loads(row[0])
+        self.memory.put(key, result)
+        return dict(result)
+
+    def put(self, key, result):
+        """Store a copy of result under key in every tier"""
+        result = dict(result)
+        self.memory.put(key, result)
+        if not self.path:
+            return
+
+        try:
+            with self._lock:
+                db = self._db()
+                db.execute('INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)',
+                           (key, json.dumps(result)))
+                db.commit()
+        except sqlite3.Error as e:
+            print(f"Error writing result cache: {e}")
+
+    def stats(self):
+        """Return hit/miss counters for both tiers"""
+        disk_lookups = self.disk_hits + self.disk_misses
+        return {
+            'memory': self.memory.stats(),
+            'disk': {
+                'enabled': bool(self.path),
+                'hits': self.disk_hits,
+                'misses': self.disk_misses,
+                'hit_rate': self.disk_hits / disk_lookups if disk_lookups else 0.0
+            }
+        }
+
+# Shared cache for NLP evaluation results
+result_cache = ResultCache()
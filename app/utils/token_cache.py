@@ -0,0 +1,56 @@
+import os
+import threading
+from nltk.stem import PorterStemmer
+from nltk.corpus import stopwords
+from app.utils.lru_cache import LRUCache
+from app.utils.nltk_resources import NLTKResources
+
+# Maximum number of distinct tokens whose stems are kept in memory
+STEM_CACHE_SIZE = int(os.getenv('STEM_CACHE_SIZE', '50000'))
+
+class TokenCache:
+    """
+    Process-wide stem and normalization cache shared by the NLP evaluators
+
+    Our traffic reuses a small vocabulary, so each distinct token is stemmed
+    once and looked up afterwards. The stopword set is loaded once instead of
+    on every call.
+    """
+    _stemmer = PorterStemmer()
+    _stems = LRUCache(STEM_CACHE_SIZE)
+    _stopwords = None
+    _stopwords_lock = threading.Lock()
+
+    @staticmethod
+    def stem(token):
+        """Return the Porter stem of token, computing it only on a cache miss"""
+        return TokenCache._stems.get_or_compute(token, lambda: TokenCache._stemmer.stem(token))
+
+    @staticmethod
+    def stem_tokens(tokens):
+        """Stem a list of tokens through the shared cache"""
+        return [TokenCache.stem(token) for token in tokens]
+
+    @staticmethod
+    def stopwords():
+        """Return the English stopword set, loading it on first use"""
+        if TokenCache._stopwords is None:
+            with TokenCache._stopwords_lock:
+                if TokenCache._stopwords is None:
+                    NLTKResources.require('stopwords')
+                    TokenCache._stopwords = frozenset(stopwords.words('english'))
+        return TokenCache._stopwords
+
+    @staticmethod
+    def content_words(tokens):
+        """Keep alphanumeric tokens that are not stopwords"""
+        stop_words = TokenCache.stopwords()
+        return [token for token in tokens if token.isalnum() and token not in stop_words]
+
+    @staticmethod
+    def stats():
+        """Return hit/miss counters for the stem cache"""
+        return {
+            'stems': TokenCache._stems.stats(),
+            'stopwords_loaded': TokenCache._stopwords is not None
+        }
@@ -0,0 +1,156 @@
+import os
+import re
+import nltk
+from nltk.tokenize import word_tokenize as nltk_word_tokenize, sent_tokenize as nltk_sent_tokenize
+from app.utils.nltk_resources import NLTKResources
+
+# Tokenization backend used by the NLP evaluators: 'nltk' (Punkt + Treebank)
+# or 'fast' (compiled regular expressions)
+TOKENIZER_BACKEND = os.getenv('NLP_TOKENIZER', 'nltk').lower()
+
+BACKENDS = ('nltk', 'fast')
+
+# Words the Treebank tokenizer splits in two even without punctuation
+# (MacIntyre contractions), e.g. "cannot" -> "can", "not"
+_SPLIT_WORDS = {
+    'cannot': ('can', 'not'),
+    'gimme': ('gim', 'me'),
+    'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'),
+    'lemme': ('lem', 'me'),
+    'wanna': ('wan', 'na')
+}
+
+# Characters the Treebank tokenizer always splits off as their own token
+_SPLIT_CHARS = r";@#$%&?!*()\[\]{}<>\"`«»“”‘’„"
+
+# Clitics split from the end of a word, e.g. "don't" -> "do", "n't"
+_CLITIC = r"(?:'[sSmMdD]|'ll|'LL|'re|'RE|'ve|'VE|n't|N'T)(?=[\s" + _SPLIT_CHARS + r",:.]|$)"
+
+# Sentence-final period: followed only by closing brackets/quotes to the end
+# of the sentence. Like word_tokenize, text is split into sentences first, so
+# periods inside a sentence ("Dr.", "e.g.", "4. that") stay in their word.
+_FINAL_PERIOD = r"\.(?=[\])}>\"']*$)"
+
+# Approximates Treebank tokens on one sentence in a single pass: ellipses,
+# double dashes, always-split characters, commas and colons outside numbers,
+# clitics, trailing apostrophes and the sentence-final period become their
+# own tokens; everything else (3.14, 3,000, e.g., 2+2, well-known) stays in a word
+_WORD_RE = re.compile(
+    r"\.{2,}"
+    r"|--"
+    r"|[" + _SPLIT_CHARS + r"]"
+    r"|[,:](?!\d)"
+    r"|(?<=[^\s'])" + _CLITIC +
+    r"|'(?=\s|$)"
+    r"|" + _FINAL_PERIOD +
+    r"|(?:(?!" + _CLITIC + r"|'(?:\s|$)|" + _FINAL_PERIOD + r"|\.\.|--)"
+    r"(?:[^\s" + _SPLIT_CHARS + r",:]|[,:](?=\d)))+"
+)
+
+# Candidate sentence end: terminal punctuation, optional closing quotes or
+# brackets, then whitespace
+_SENTENCE_END_RE = re.compile(r"""([.!?]+["'”’)\]]*)\s+""")
+
+_NUMBER_RE = re.compile(r"[-+]?[\d.,]*\d")
+
+# Common abbreviations a period does not end a sentence after
+_ABBREVIATIONS = {
+    'dr', 'mr', 'mrs', 'ms', 'prof', 'sr', 'jr', 'st', 'vs', 'etc', 'e.g', 'i.e',
+    'u.s', 'u.k', 'inc', 'ltd', 'co', 'corp', 'no', 'fig', 'approx', 'jan', 'feb',
+    'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec'
+}
+
+def _iter_fast_sentences(text):
+    # Yield sentences split at terminal punctuation the way Punkt does: a
+    # period doesn't end a sentence after an abbreviation, and neither does an
+    # ellipsis or a number's period when the next word is lowercase
+    # ("sure... but", "it is 4. that")
+    start = 0
+    for match in _SENTENCE_END_RE.finditer(text):
+        if match.group(1).startswith('..') and text[match.end():match.end() + 1].islower():
+            continue
+        if match.group(1) == '.':
+            word = text[start:match.start(1)].rsplit(None, 1)
+            if word and word[-1].lower() in _ABBREVIATIONS:
+                continue
+            if word and _NUMBER_RE.fullmatch(word[-1]) and text[match.end():match.end() + 1].islower():
+                continue
+        sentence = text[start:match.end(1)].strip()
+        if sentence:
+            yield sentence
+        start = match.end()
+    sentence = text[start:].strip()
+    if sentence:
+        yield sentence
+
+def _split_contractions(tokens):
+    # Split "cannot", "gonna" and friends the way the Treebank tokenizer does
+    result = []
+    for token in tokens:
+        split = _SPLIT_WORDS.get(token.lower())
+        if split:
+            result.append(token[:len(split[0])])
+            result.append(token[len(split[0]):])
+        else:
+            result.append(token)
+    return result
+
+class Tokenizer:
+    """
+    Selectable word and sentence tokenization for the NLP evaluators
+
+    The 'nltk' backend is the reference. The 'fast' backend replaces Punkt
+    and the Treebank tokenizer with compiled regular expressions; it is exact
+    for text already stripped of punctuation and approximate otherwise. Run
+    test_tokenizer_parity.py to measure score drift between the two.
+    """
+    backend = TOKENIZER_BACKEND if TOKENIZER_BACKEND in BACKENDS else 'nltk'
+
+    @staticmethod
+    def set_backend(name):
+        """Switch the process-wide tokenization backend"""
+        name = name.lower()
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown tokenizer backend '{name}', expected one of {BACKENDS}")
+        Tokenizer.backend = name
+
+    @staticmethod
+    def word_tokenize(text):
+        """Split raw text (punctuation included) into word tokens"""
+        if Tokenizer.backend == 'fast':
+            return _split_contractions([token for sentence in _iter_fast_sentences(text)
+                                        for token in _WORD_RE.findall(sentence)])
+        NLTKResources.require('punkt')
+        return nltk_word_tokenize(text)
+
+    @staticmethod
+    def clean_word_tokenize(text):
+        """Split text already stripped of punctuation into word tokens"""
+        if Tokenizer.backend == 'fast':
+            return _split_contractions(text.split())
+        NLTKResources.require('punkt')
+        return nltk_word_tokenize(text)
+
+    @staticmethod
+    def sent_tokenize(text):
+        """Split raw text into sentences"""
+        if Tokenizer.backend == 'fast':
+            return list(_iter_fast_sentences(text))
+        NLTKResources.require('punkt')
+        return nltk_sent_tokenize(text)
+
+    @staticmethod
+    def iter_sentences(text):
+        """
+        Yield the sentences sent_tokenize would return, one at a time
+
+        Lets callers walk very long texts without building the sentence list.
+        """
+        if Tokenizer.backend == 'fast':
+            yield from _iter_fast_sentences(text)
+            return
+        NLTKResources.require('punkt')
+        punkt = nltk.data.load('tokenizers/punkt/english.pickle')
+        for start, end in punkt.span_tokenize(text):
+            yield text[start:end]
@@ -0,0 +1,253 @@
+"""
+Micro-benchmarks for the evaluators
+Generates seeded synthetic corpora of short prompts, paragraphs and very long
+responses, then reports per-metric latency percentiles, throughput and peak
+memory for NLPEvaluator, LogicEvaluator, MathEvaluator and RAGEvaluator.
+Results are saved as JSON so two runs can be diffed.
+
+Usage:
+  python benchmark_evaluators.py [--evaluators nlp,logic,math,rag]
+                                 [--sizes short,paragraph,long]
+                                 [--repeat 20] [--output bench_results.json]
+  python benchmark_evaluators.py --compare before.json after.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+VOCABULARY = (
+    "the capital of france is paris a city known for art and culture it has many museums "
+    "jupiter is the largest planet in our solar system with dozens of moons orbiting it "
+    "photosynthesis converts light energy into chemical energy plants absorb water and carbon "
+    "dioxide to produce glucose and oxygen the process happens in chloroplasts however results "
+    "increase decrease always never more less true false because therefore although"
+).split()
+
+SHORT_PROMPTS = ["Hi", "Hello", "Hey there", "Thanks!", "Good morning"]
+
+QUESTIONS = [
+    "What is the capital of France?",
+    "Explain how photosynthesis works.",
+    "Tell me about Jupiter and its moons.",
+    "Why is the sky blue?"
+]
+
+# Sentences per response for each corpus size
+SIZES = {
+    'short': (1, 2),
+    'paragraph': (4, 8),
+    'long': (400, 600)
+}
+
+def make_sentence(rng):
+    words = [rng.choice(VOCABULARY) for _ in range(rng.randint(4, 20))]
+    return " ".join(words).capitalize() + rng.choice(['.', '.', '.', '!', '?'])
+
+def make_corpus(size, count, rng):
+    """Build (question, response) pairs whose responses have the given size"""
+    low, high = SIZES[size]
+    prompts = SHORT_PROMPTS if size == 'short' else QUESTIONS
+    return [(rng.choice(prompts), " ".join(make_sentence(rng) for _ in range(rng.randint(low, high))))
+            for _ in range(count)]
+
+def make_math_corpus(size, count, rng):
+    """Build (question, response) pairs with arithmetic to check"""
+    pairs = []
+    for _ in range(count):
+        a, b, c = rng.randint(1, 99), rng.randint(1, 99), rng.randint(1, 9)
+        answer = a + b * c
+        if rng.random() < 0.3:
+            answer += rng.randint(1, 10)
+        filler = " ".join(make_sentence(rng) for _ in range(rng.randint(*SIZES[size]) - 1))
+        pairs.append((f"What is {a}+{b}*{c}?", f"{filler} The result is {answer}".strip()))
+    return pairs
+
+def load_metrics(name):
+    """
+    Return {metric: fn(question, response)} for an evaluator
+
+    Evaluators whose dependencies are missing raise ImportError and are
+    skipped by the caller.
+    """
+    if name == 'nlp':
+        from app.utils.nlp_evaluator import NLPEvaluator
+        return {
+            'coherence': lambda q, r: NLPEvaluator.evaluate_coherence(r, q),
+            'token_overlap': lambda q, r: NLPEvaluator.calculate_token_overlap(q, r),
+            'length_ratio': lambda q, r: NLPEvaluator.calculate_length_ratio(q, r),
+            # score_pairs bypasses the result cache so every call does the work
+            'evaluate_text': lambda q, r: NLPEvaluator.score_pairs([q], [r])
+        }
+    if name == 'logic':
+        from app.utils.logic_evaluator import LogicEvaluator
+        LogicEvaluator.get_model()
+        return {
+            'semantic_similarity': lambda q, r: LogicEvaluator.semantic_similarity(q, r),
+            'logical_consistency': lambda q, r: LogicEvaluator.check_logical_consistency(r)
+        }
+    if name == 'math':
+        from app.utils.math_evaluator import MathEvaluator
+        return {
+            'extract_math_expression': lambda q, r: MathEvaluator.extract_math_expression(r),
+            'math_validity': lambda q, r: MathEvaluator.check_math_validity(r, q)
+        }
+    if name == 'rag':
+        from app.utils.evaluation import evaluator
+        evaluator.model
+        return {
+            'evaluate_single_response': lambda q, r: evaluator.evaluate_single_response(
+                q, r, r[:200], [r[:100], q])
+        }
+    raise ValueError(f"Unknown evaluator '{name}'")
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def clear_caches():
+    """
+    Empty the math result caches and the embedding cache
+
+    Called before every timed pass so each pass measures the evaluation
+    itself rather than cache hits left by the previous one.
+    """
+    math_module = sys.modules.get('app.utils.math_evaluator')
+    if math_module is not None:
+        math_module.MathEvaluator._results.clear()
+        math_module.MathEvaluator._canonical.clear()
+    cache_module = sys.modules.get('app.utils.embedding_cache')
+    if cache_module is not None:
+        cache_module.embedding_cache.memory.clear()
+        # The persistent tier can't be emptied, so it is bypassed
+        cache_module.embedding_cache.directory = None
+
+def bench_metric(fn, corpus, repeat):
+    """Time fn over the corpus, then measure its peak memory in a separate pass"""
+    # Warm up lazy loads outside the measurement
+    fn(*corpus[0])
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        clear_caches()
+        for question, response in corpus:
+            t0 = time.perf_counter()
+            fn(question, response)
+            latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    # tracemalloc slows everything down, so memory is measured on its own
+    clear_caches()
+    tracemalloc.start()
+    for question, response in corpus:
+        fn(question, response)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'calls': len(latencies),
+        'mean_ms': 1000 * sum(latencies) / len(latencies),
+        'p50_ms': 1000 * percentile(latencies, 50),
+        'p90_ms': 1000 * percentile(latencies, 90),
+        'p99_ms': 1000 * percentile(latencies, 99),
+        'throughput_per_s': len(latencies) / elapsed if elapsed else 0.0,
+        'peak_memory_kb': peak / 1024
+    }
+
+def run_benchmarks(evaluators, sizes, repeat, count, seed):
+    results = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'count': count,
+            'seed': seed
+        },
+        'results': {}
+    }
+    try:
+        from app.utils.tokenizers import Tokenizer
+        results['meta']['tokenizer'] = Tokenizer.backend
+    except ImportError:
+        pass
+
+    for name in evaluators:
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                metrics = load_metrics(name)
+        except ImportError as e:
+            print(f"⚠️ Skipping {name}: {e}")
+            continue
+
+        for size in sizes:
+            rng = random.Random(f"{seed}-{name}-{size}")
+            corpus = (make_math_corpus if name == 'math' else make_corpus)(size, count, rng)
+            # Long responses are slow; fewer repeats keep the run short
+            size_repeat = max(1, repeat // 10) if size == 'long' else repeat
+
+            for metric, fn in metrics.items():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    stats = bench_metric(fn, corpus, size_repeat)
+                results['results'][f"{name}/{metric}/{size}"] = stats
+                print(f"{name:6} {metric:26} {size:10} p50 {stats['p50_ms']:9.3f} ms  "
+                      f"p99 {stats['p99_ms']:9.3f} ms  {stats['throughput_per_s']:10.1f}/s  "
+                      f"peak {stats['peak_memory_kb']:9.1f} KB")
+    return results
+
+def compare(before_path, after_path):
+    """Print the change in latency, throughput and memory between two runs"""
+    with open(before_path) as f:
+        before = json.load(f)['results']
+    with open(after_path) as f:
+        after = json.load(f)['results']
+
+    print(f"{'benchmark':50} {'p50 ms':>18} {'throughput/s':>22} {'peak KB':>20}")
+    for key in sorted(set(before) | set(after)):
+        if key not in before or key not in after:
+            print(f"{key:50} only in {'after' if key in after else 'before'}")
+            continue
+        b, a = before[key], after[key]
+        def change(field):
+            if not b[field]:
+                return f"{a[field]:.2f}"
+            return f"{a[field]:.2f} ({100 * (a[field] - b[field]) / b[field]:+.0f}%)"
+        print(f"{key:50} {change('p50_ms'):>18} {change('throughput_per_s'):>22} {change('peak_memory_kb'):>20}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the evaluators")
+    parser.add_argument('--evaluators', default='nlp,logic,math,rag',
+                        help="Comma-separated evaluators to benchmark")
+    parser.add_argument('--sizes', default='short,paragraph,long',
+                        help="Comma-separated corpus sizes: short, paragraph, long")
+    parser.add_argument('--repeat', type=int, default=20, help="Passes over each corpus")
+    parser.add_argument('--count', type=int, default=20, help="Items per corpus")
+    parser.add_argument('--seed', type=int, default=42, help="Corpus random seed")
+    parser.add_argument('--output', default='bench_results.json', help="Where to save the JSON results")
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'),
+                        help="Diff two saved result files instead of running")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        sys.exit(0)
+
+    sizes = args.sizes.split(',')
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"Unknown sizes: {', '.join(unknown)}")
+
+    results = run_benchmarks(args.evaluators.split(','), sizes, args.repeat, args.count, args.seed)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved results to {args.output}")
@@ -0,0 +1,159 @@
+"""
+Accuracy and speed report for the int8 quantized embedding model
+Encodes a fixed, seeded corpus of RAG evaluations with the float32 and the
+dynamically quantized int8 sentence-transformer, then reports encode
+throughput for both and how far every RAG metric (answer_correctness,
+faithfulness, ...) and the embeddings themselves drift under quantization.
+Set EMBEDDING_QUANTIZE=true once the drift is acceptable.
+
+Usage:
+  python benchmark_quantization.py [--count 200] [--repeat 3]
+                                   [--max-drift 0.02] [--output quant_results.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from benchmark_evaluators import QUESTIONS, make_sentence
+
+# Hand-written items so the corpus isn't only synthetic word salad
+FIXED_ITEMS = [
+    ("What is the capital of France?",
+     "The capital of France is Paris.",
+     "Paris is the capital of France.",
+     ["Paris is the capital of France and is known as the City of Light.",
+      "The Eiffel Tower is a wrought-iron lattice tower in Paris, France."]),
+    ("How many moons does Jupiter have?",
+     "Jupiter has 79 known moons.",
+     "Jupiter has dozens of moons, 79 of them confirmed.",
+     ["Jupiter has 79 known moons.", "Jupiter is the largest planet in our solar system."]),
+    ("When was Pride and Prejudice published?",
+     "It came out in 1813.",
+     "Pride and Prejudice was published in 1813.",
+     ["Pride and Prejudice was published in 1813.", "Jane Austen was an English novelist."])
+]
+
+def make_corpus(count, seed):
+    """Build (question, answer, reference, contexts) items"""
+    rng = random.Random(seed)
+    items = list(FIXED_ITEMS)
+    while len(items) < count:
+        items.append((
+            rng.choice(QUESTIONS),
+            " ".join(make_sentence(rng) for _ in range(rng.randint(1, 4))),
+            " ".join(make_sentence(rng) for _ in range(rng.randint(1, 4))),
+            [" ".join(make_sentence(rng) for _ in range(rng.randint(1, 3))) for _ in range(rng.randint(1, 4))]
+        ))
+    return items[:count]
+
+def corpus_texts(corpus):
+    texts = []
+    for question, answer, reference, contexts in corpus:
+        texts.extend([question, answer, reference])
+        texts.extend(contexts)
+    return list(dict.fromkeys(texts))
+
+def encode_throughput(model, texts, repeat):
+    """Texts per second for raw model.encode calls (bypassing the embedding cache)"""
+    model.encode(texts[:8], normalize_embeddings=True)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        model.encode(texts, normalize_embeddings=True)
+    elapsed = time.perf_counter() - start
+    return len(texts) * repeat / elapsed if elapsed else 0.0
+
+def run(count, repeat, seed):
+    from app.utils.evaluation import RAGEvaluator
+    from app.utils.model_registry import ModelRegistry
+
+    corpus = make_corpus(count, seed)
+    texts = corpus_texts(corpus)
+    with contextlib.redirect_stdout(io.StringIO()):
+        float_model = ModelRegistry.get(quantize=False)
+        int8_model = ModelRegistry.get(quantize=True)
+
+    results = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'model': ModelRegistry.model_id(quantize=False),
+            'items': len(corpus),
+            'texts': len(texts),
+            'repeat': repeat,
+            'seed': seed
+        },
+        'models': ModelRegistry.stats()
+    }
+
+    float_rate = encode_throughput(float_model, texts, repeat)
+    int8_rate = encode_throughput(int8_model, texts, repeat)
+    results['throughput'] = {
+        'float32_texts_per_s': float_rate,
+        'int8_texts_per_s': int8_rate,
+        'speedup': int8_rate / float_rate if float_rate else 0.0
+    }
+
+    # Cosine similarity between each text's float32 and int8 embeddings
+    cosines = np.sum(ModelRegistry.encode(texts, quantize=False) * ModelRegistry.encode(texts, quantize=True), axis=1)
+    results['embedding_cosine'] = {'mean': float(np.mean(cosines)), 'min': float(np.min(cosines))}
+
+    float_evaluator, int8_evaluator = RAGEvaluator(quantize=False), RAGEvaluator(quantize=True)
+    diffs = {}
+    for question, answer, reference, contexts in corpus:
+        expected = float_evaluator.evaluate_single_response(question, answer, reference, contexts)
+        actual = int8_evaluator.evaluate_single_response(question, answer, reference, contexts)
+        for metric, value in expected.items():
+            diffs.setdefault(metric, []).append(actual[metric] - value)
+    results['metric_drift'] = {
+        metric: {
+            'mean_abs': float(np.mean(np.abs(values))),
+            'max_abs': float(np.max(np.abs(values))),
+            'mean_signed': float(np.mean(values))
+        }
+        for metric, values in diffs.items()
+    }
+    return results
+
+def report(results):
+    throughput = results['throughput']
+    print(f"Corpus: {results['meta']['items']} items, {results['meta']['texts']} unique texts")
+    print(f"Encode throughput: float32 {throughput['float32_texts_per_s']:.1f}/s, "
+          f"int8 {throughput['int8_texts_per_s']:.1f}/s ({throughput['speedup']:.2f}x)")
+    for model_id, stats in results['models'].items():
+        print(f"  {model_id:30} load {stats['load_seconds']:.2f}s  parameters {stats['parameter_bytes'] / 2**20:.1f} MB")
+    cosine = results['embedding_cosine']
+    print(f"Embedding cosine float32 vs int8: mean {cosine['mean']:.4f}, min {cosine['min']:.4f}")
+    print(f"{'metric':22} {'mean |drift|':>14} {'max |drift|':>14} {'mean drift':>12}")
+    for metric, drift in results['metric_drift'].items():
+        print(f"{metric:22} {drift['mean_abs']:14.5f} {drift['max_abs']:14.5f} {drift['mean_signed']:+12.5f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the int8 quantized embedding model with float32")
+    parser.add_argument('--count', type=int, default=200, help="RAG evaluations in the corpus")
+    parser.add_argument('--repeat', type=int, default=3, help="Encode passes for the throughput measurement")
+    parser.add_argument('--seed', type=int, default=42, help="Corpus random seed")
+    parser.add_argument('--max-drift', type=float,
+                        help="Exit with status 1 if any metric's max |drift| exceeds this")
+    parser.add_argument('--output', default='quant_results.json', help="Where to save the JSON results")
+    args = parser.parse_args()
+
+    results = run(args.count, args.repeat, args.seed)
+    report(results)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved results to {args.output}")
+
+    if args.max_drift is not None:
+        worst = max(drift['max_abs'] for drift in results['metric_drift'].values())
+        if worst > args.max_drift:
+            print(f"Max drift {worst:.5f} exceeds {args.max_drift}")
+            sys.exit(1)
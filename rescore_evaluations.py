@@ -0,0 +1,75 @@
+"""
+Re-score every stored evaluation with the current NLP evaluator
+and rebuild the leaderboard metric averages from the new scores.
+
+User ratings and feedback counts on the leaderboard are left untouched.
+"""
+from app import create_app, db
+from app.models.evaluation import Evaluation
+from app.models.leaderboard import Leaderboard
+from app.utils.nlp_evaluator import NLPEvaluator
+from app.services.evaluation_executor import get_executor
+
+# Number of question/response pairs scored per evaluate_batch call
+BATCH_SIZE = 500
+
+def rescore_evaluations():
+    """Re-score all evaluations, batching pairs across evaluations"""
+    evaluations = Evaluation.query.order_by(Evaluation.created_at).all()
+    print(f"Re-scoring {len(evaluations)} evaluations...")
+
+    # Collect (evaluation, model, question, response) for non-empty responses,
+    # matching what EvaluationService.evaluate_responses scores
+    pairs = []
+    for evaluation in evaluations:
+        for model_name, response_text in (evaluation.responses or {}).items():
+            if response_text:
+                pairs.append((evaluation, model_name, evaluation.question, response_text))
+
+    new_scores = {evaluation.id: {} for evaluation in evaluations}
+    for start in range(0, len(pairs), BATCH_SIZE):
+        chunk = pairs[start:start + BATCH_SIZE]
+        metrics = NLPEvaluator.evaluate_batch([p[2] for p in chunk], [p[3] for p in chunk],
+                                              executor=get_executor())
+        for (evaluation, model_name, _, _), scores in zip(chunk, metrics):
+            new_scores[evaluation.id][model_name] = scores
+        print(f"Scored {min(start + BATCH_SIZE, len(pairs))}/{len(pairs)} responses")
+
+    for evaluation in evaluations:
+        evaluation.scores = new_scores[evaluation.id]
+
+    return evaluations
+
+def rebuild_leaderboard(evaluations):
+    """Replay the new scores into the leaderboard metric averages"""
+    entries = {entry.model_name: entry for entry in Leaderboard.query.all()}
+    for entry in entries.values():
+        entry.avg_coherence = 0.0
+        entry.avg_token_overlap = 0.0
+        entry.avg_length_ratio = 0.0
+        entry.avg_final_score = 0.0
+        entry.total_evaluations = 0
+
+    for evaluation in evaluations:
+        for model_name, scores in evaluation.scores.items():
+            if model_name not in entries:
+                entries[model_name] = Leaderboard(model_name=model_name)
+                db.session.add(entries[model_name])
+            entries[model_name].update_scores(scores)
+
+    print(f"Rebuilt leaderboard averages for {len(entries)} models")
+
+if __name__ == "__main__":
+    # Create the app and push an application context; guarded so process
+    # pool workers (EVAL_EXECUTOR=process) don't re-run the script
+    app = create_app()
+    app.app_context().push()
+
+    try:
+        rescored = rescore_evaluations()
+        rebuild_leaderboard(rescored)
+        db.session.commit()
+        print("Re-scoring completed!")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error during re-scoring: {e}")
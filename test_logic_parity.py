@@ -0,0 +1,70 @@
+"""
+Regression check for the lexicon-based logical consistency score
+Scores a fixed set of responses with LogicEvaluator.check_logical_consistency
+and with the original hardcoded pair check, and reports every response
+whose score differs. With the default lexicon the two must agree exactly.
+
+Usage: python test_logic_parity.py
+Exits with status 1 if any score differs.
+"""
+import sys
+from app.utils.logic_evaluator import LogicEvaluator
+
+# The pairs and scoring of the check the lexicon replaced
+BASELINE_PAIRS = [
+    ("increase", "decrease"),
+    ("more", "less"),
+    ("larger", "smaller"),
+    ("higher", "lower"),
+    ("true", "false"),
+    ("correct", "incorrect"),
+    ("yes", "no"),
+    ("positive", "negative"),
+    ("always", "never")
+]
+
+RESPONSES = [
+    "Yes, there is no problem with that.",
+    "It is more efficient and less costly.",
+    "Add more salt. There is no more sugar.",
+    "That is never false, it is always true.",
+    "Prices increase in summer and decrease in winter.",
+    "The statement is true. Actually, the statement is false.",
+    "Higher rates mean lower demand, and larger firms beat smaller ones.",
+    "The answer is correct, not incorrect.",
+    "Results were positive overall, with one negative outlier.",
+    "It always works. It never fails.",
+    "Prices increase, they do not decrease.",
+    "It is true. It is not true.",
+    "Photosynthesis converts light energy into chemical energy.",
+    "Yes.",
+    "No!",
+    "The the a an of.",
+    "TRUE or FALSE? Always, or NEVER?",
+    ""
+]
+
+def baseline_score(response):
+    """Score a response the way check_logical_consistency did before the lexicon"""
+    tokens = LogicEvaluator.preprocess_text(response)
+    if not tokens:
+        return 0.5
+    found = sum(1 for first, second in BASELINE_PAIRS if first in tokens and second in tokens)
+    return max(0, 1.0 - found * 0.2)
+
+def check_scores():
+    """Return (response, baseline, current) for every response whose score differs"""
+    diffs = []
+    for response in RESPONSES:
+        expected = baseline_score(response)
+        actual = LogicEvaluator.check_logical_consistency(response, mode='lexicon')
+        if abs(actual - expected) > 1e-9:
+            diffs.append((response, expected, actual))
+    return diffs
+
+if __name__ == "__main__":
+    diffs = check_scores()
+    for response, expected, actual in diffs:
+        print(f"{expected:.2f} -> {actual:.2f}: {response!r}")
+    print(f"{len(diffs)} of {len(RESPONSES)} responses differ from the original pair check")
+    sys.exit(1 if diffs else 0)
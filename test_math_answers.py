@@ -0,0 +1,43 @@
+"""
+Regression check for how math validity finds a response's final answer
+Scores fixed question/response pairs with MathEvaluator.check_math_validity
+and reports every pair whose score differs from the expected one.
+
+Usage: python test_math_answers.py
+Exits with status 1 if any score differs.
+"""
+import contextlib
+import io
+import sys
+from app.utils.math_evaluator import MathEvaluator
+
+# (question, response, expected score)
+CASES = [
+    ("What is 2*4?", "The answer is 8. That's because 2*3 is 6.", 1.0),
+    ("What is 2*4?", "The final answer is 8, since there are 3 groups of 2.", 1.0),
+    ("What is 2*4?", "2*4 is 8.", 1.0),
+    ("What is 2*4?", "It is 8.", 1.0),
+    ("What is 6*7?", "Let me think about it, so the result is 42", 1.0),
+    ("What is 6*7?", "6*7 = 42", 1.0),
+    ("What is 2+2*3?", "2+2*3 = 12", 0.0),
+    ("What is 15+27?", "The sum of 15 and 27 is 42.", 1.0),
+    ("What is 2^3^2?", "512", 1.0),
+    ("What is 100/4?", "First, 100/2 is 50. Then 50/2 = 25.", 1.0)
+]
+
+def check_answers():
+    """Return (question, response, expected, actual) for every case that differs"""
+    diffs = []
+    for question, response, expected in CASES:
+        with contextlib.redirect_stdout(io.StringIO()):
+            actual = MathEvaluator.check_math_validity(response, question)
+        if abs(actual - expected) > 1e-9:
+            diffs.append((question, response, expected, actual))
+    return diffs
+
+if __name__ == "__main__":
+    diffs = check_answers()
+    for question, response, expected, actual in diffs:
+        print(f"{question!r} / {response!r}: expected {expected}, got {actual}")
+    print(f"{len(diffs)} of {len(CASES)} cases differ")
+    sys.exit(1 if diffs else 0)
@@ -0,0 +1,168 @@
+"""
+Parity check between the 'nltk' and 'fast' tokenizer backends
+Scores a fixed corpus with both backends and reports any score drift,
+so the fast backend can be enabled in production (NLP_TOKENIZER=fast)
+once drift is zero or bounded.
+
+Scores are compared against the pinned English Punkt model (installed by
+warmup_nltk.py --download). Drift can only come from sentence splitting at
+abbreviations the model and the fast backend disagree on; on this corpus
+it is zero, so any drift is a regression. An untrained Punkt model splits
+after every abbreviation and is refused rather than compared against.
+
+Usage: python test_tokenizer_parity.py [--max-drift 0]
+Exits with status 1 if the Punkt model is untrained or any metric drifts
+by more than --max-drift.
+"""
+import argparse
+import contextlib
+import io
+import sys
+import nltk
+from app.utils.nltk_resources import NLTKResources
+from app.utils.nlp_evaluator import NLPEvaluator
+from app.utils.token_cache import TokenCache
+from app.utils.tokenizers import Tokenizer
+
+QUESTIONS = [
+    "Hi",
+    "Hello",
+    "Hey there",
+    "What is the capital of France?",
+    "What is 2+2?",
+    "Can't you explain how photosynthesis works?",
+    "Who wrote Pride and Prejudice, and when was it published?",
+    "Explain the difference between TCP/IP and UDP in networking."
+]
+
+RESPONSES = [
+    "Hi there! How can I assist you today?",
+    "Hello.",
+    "Hey! What's up?",
+    "Greetings! I hope you're having a wonderful day. How can I help?",
+    "The capital of France is Paris.",
+    "Paris is the capital city of France, located on the Seine River.",
+    "France's capital is Paris, a major European cultural center.",
+    "2+2 = 4.",
+    "The answer is 4. That's it!",
+    "I cannot say for sure... but I'm gonna guess it's 4.",
+    "Photosynthesis converts light energy into chemical energy. Plants use "
+    "chlorophyll to absorb sunlight; they don't need much else besides water "
+    "and CO2. The process releases oxygen as a by-product.",
+    "Jane Austen wrote Pride and Prejudice. It was published in 1813. "
+    "Dr. Johnson's dictionary predates it by decades, e.g. by about 58 years.",
+    "TCP is connection-oriented and reliable. UDP is connectionless! "
+    "Use TCP for web pages (HTTP) and UDP for streaming/gaming, i.e. where "
+    "speed matters more than reliability.",
+    "\"Quoted text,\" she said. 'Single quotes' too -- and dashes.",
+    "Prices rose from $3.88 to $4,200 in the U.S. last year. Really?! Yes.",
+    "Lemme think. Gimme a sec. Wanna know? Gotta go.",
+    "One. Two. Three. Four. Five. Six. Seven. Eight.",
+    "A long answer without any sentence-ending punctuation at all that just keeps going",
+    "",
+    "   "
+]
+
+METRICS = ['coherence', 'token_overlap', 'length_ratio', 'overall_score']
+
+# The fast backend must score this corpus exactly like Punkt. Scores are rounded
+# to 2 decimals, so any real drift is at least 0.01 and a zero bound catches it
+MAX_DRIFT = 0.0
+
+def check_punkt_model():
+    """Make sure the installed Punkt model is a trained one"""
+    NLTKResources.require('punkt')
+    punkt = nltk.data.load('tokenizers/punkt/english.pickle')
+    if not punkt._params.abbrev_types:
+        print("❌ The installed Punkt model knows no abbreviations, so it isn't the pinned English "
+              "model. Run 'python warmup_nltk.py --download' before checking parity.")
+        return False
+    print(f"Punkt model: {len(punkt._params.abbrev_types)} abbreviations")
+    return True
+
+def score_corpus(backend):
+    """Score every question/response pair with the given backend"""
+    Tokenizer.set_backend(backend)
+    scores = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for question in QUESTIONS:
+            batch = NLPEvaluator.evaluate_batch(question, RESPONSES)
+            for response, metrics in zip(RESPONSES, batch):
+                scores[(question, response)] = metrics
+    return scores
+
+def tokenize_corpus(backend):
+    """Tokenize every text the way NLPEvaluator and LogicEvaluator do"""
+    Tokenizer.set_backend(backend)
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyses = {text: NLPEvaluator.analyze(text) for text in QUESTIONS + RESPONSES}
+    return {
+        text: {
+            'tokens': analysis.tokens,
+            'sentences': len(analysis.sentences),
+            'logic_tokens': TokenCache.content_words(Tokenizer.word_tokenize(text.lower()))
+        }
+        for text, analysis in analyses.items()
+    }
+
+def check_token_parity():
+    """Compare tokens and sentence counts between backends"""
+    print("\n=== TOKEN PARITY ===\n")
+    reference = tokenize_corpus('nltk')
+    fast = tokenize_corpus('fast')
+
+    token_mismatches = 0
+    for text in reference:
+        for key in ('tokens', 'sentences', 'logic_tokens'):
+            if reference[text][key] != fast[text][key]:
+                if key == 'tokens':
+                    token_mismatches += 1
+                print(f"- {key} differ for '{text[:50]}'")
+                print(f"    nltk: {reference[text][key]}")
+                print(f"    fast: {fast[text][key]}")
+
+    # Punctuation-stripped tokens are expected to match exactly
+    if token_mismatches:
+        print(f"❌ {token_mismatches} texts tokenize differently after punctuation stripping")
+    else:
+        print("✅ Punctuation-stripped tokens identical for every text")
+    return token_mismatches
+
+def check_score_parity(max_drift):
+    """Compare evaluation scores between backends and report drift"""
+    print("\n=== SCORE PARITY ===\n")
+    reference = score_corpus('nltk')
+    fast = score_corpus('fast')
+
+    worst = 0.0
+    for metric in METRICS:
+        drifts = [abs(reference[pair][metric] - fast[pair][metric]) for pair in reference]
+        drifted = sum(1 for d in drifts if d > 0)
+        print(f"{metric}: max drift {max(drifts):.4f}, mean drift {sum(drifts) / len(drifts):.4f}, "
+              f"{drifted}/{len(drifts)} pairs changed")
+        worst = max(worst, max(drifts))
+
+    for (question, response), metrics in reference.items():
+        changed = {m: (metrics[m], fast[(question, response)][m]) for m in METRICS
+                   if metrics[m] != fast[(question, response)][m]}
+        if changed:
+            print(f"- '{question[:30]}' / '{response[:40]}': {changed}")
+
+    # Scores are rounded to 2 decimals, so allow for float error in their differences
+    if worst > max_drift + 1e-9:
+        print(f"\n❌ Max drift {worst:.4f} exceeds allowed {max_drift:.4f}")
+        return False
+    print(f"\n✅ Max drift {worst:.4f} within allowed {max_drift:.4f}")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--max-drift', type=float, default=MAX_DRIFT,
+                        help="Largest allowed absolute drift in any metric")
+    args = parser.parse_args()
+
+    if not check_punkt_model():
+        sys.exit(1)
+    token_mismatches = check_token_parity()
+    scores_ok = check_score_parity(args.max_drift)
+    sys.exit(0 if scores_ok and not token_mismatches else 1)
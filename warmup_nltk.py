@@ -0,0 +1,28 @@
+"""
+Verify and preload the NLTK data used by the evaluators
+Run once per deployment (e.g. at build time) so workers never download
+anything at runtime.
+
+Usage: python warmup_nltk.py [--download]
+  --download  Download missing resources into NLTK_DATA_DIR first
+Exits with status 1 if any resource is still missing.
+"""
+import argparse
+import sys
+from app.utils.nltk_resources import NLTKResources, NLTK_DATA_DIR
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify and preload NLTK data")
+    parser.add_argument('--download', action='store_true',
+                        help="Download missing resources into NLTK_DATA_DIR")
+    args = parser.parse_args()
+
+    print(f"NLTK data directory: {NLTK_DATA_DIR}")
+    status = NLTKResources.warmup(download=args.download)
+    for name, available in status.items():
+        print(f"{'✅' if available else '❌'} {name}")
+
+    if not all(status.values()):
+        print("Some NLTK resources are missing. Run with --download to install them.")
+        sys.exit(1)
+    print("All NLTK resources available.")